@@ -1,9 +1,12 @@
-import re
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QMessageBox, QCheckBox, QGroupBox, QFileDialog
 from PyQt6.QtGui import QGuiApplication
 from qfluentwidgets import PushButton, TextEdit, LineEdit, ComboBox
+from utils.converter_utils import METHOD_DISCORD_YOUTUBE, METHOD_RKN, METHOD_UNIVERSAL, convert_batch, format_config
 from utils.utils import tr
 
+# Способы в порядке пунктов списка "Выбор метода"
+METHODS = [METHOD_UNIVERSAL, METHOD_DISCORD_YOUTUBE, METHOD_RKN]
+
 class ConfigConverterDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -72,7 +75,7 @@ class ConfigConverterDialog(QDialog):
             QMessageBox.warning(self, tr("Ошибка"), tr("Название конфигурации обязательно!"))
             return
 
-        method = self.method_combobox.currentText()
+        method = METHODS[max(self.method_combobox.currentIndex(), 0)]
         add_script_options = self.script_options_checkbox.isChecked()
         command = self.input_text.toPlainText()
 
@@ -100,48 +103,7 @@ class ConfigConverterDialog(QDialog):
             QMessageBox.information(self, tr("Сохранено"), tr("Файл успешно сохранен!"))
 
     def convert_command_to_config(self, command: str, config_name: str, method: str, add_script_options: bool) -> str:
-        command = re.sub(r'start.*?winws\.exe', '', command, flags=re.IGNORECASE).strip()
-        command = command.replace('"', '').replace('^', '').strip()
-
-        args = re.split(r'\s+--', command)
-        args = [arg.strip() for arg in args if arg.strip()]
-
-        if method == tr("Универсальный метод"):
-            hostlist_var = "{BLACKLIST_FILES_2}"
-        elif method == tr("Обход Discord + YouTube"):
-            hostlist_var = "{BLACKLIST_FILES_1}"
-        elif method == tr("Обход блокировок для РКН"):
-            hostlist_var = "{BLACKLIST_FILES_0}"
-        else:
-            hostlist_var = "{BLACKLIST_FILES_2}"
-
-        variables = {
-            "%~dp0": "{ZAPRET_FOLDER}\\",
-            "%~dp0ipset-discord.txt": "{BLACKLIST_FOLDER}\\ipset-discord.txt",
-            "%~dp0tls_clienthello_www_google_com.bin": "{ZAPRET_FOLDER}\\tls_clienthello_www_google_com.bin",
-            "%~dp0quic_initial_www_google_com.bin": "{ZAPRET_FOLDER}\\quic_initial_www_google_com.bin",
-        }
-
-        formatted_args = []
-        for arg in args:
-            if not arg.startswith("--"):
-                arg = "--" + arg
-
-            if arg.startswith("--hostlist"):
-                arg = f"--hostlist={hostlist_var};"
-            else:
-                if arg.startswith("--ipset"):
-                    arg = arg.replace("%~dp0", "{BLACKLIST_FOLDER}\\")
-                else:
-                    for key, value in variables.items():
-                        arg = arg.replace(key, value)
-
-            formatted_args.append("    " + arg + ";")
-
-        config = ""
-        if add_script_options:
-            config += "[SCRIPT_OPTIONS]\n\n"
-        config += f"[{config_name}]\n"
-        config += "executable = {ZAPRET_FOLDER}\\winws.exe\n"
-        config += "args =\n" + "\n".join(formatted_args)
-        return config
\ No newline at end of file
+        result = convert_batch(command.splitlines(), config_name, method)
+        if result.warnings:
+            QMessageBox.warning(self, tr("Предупреждение"), "\n".join(result.warnings))
+        return format_config(result.sections, add_script_options)
@@ -1,6 +1,6 @@
-import configparser
 import logging
 import os
+import time
 from typing import List, Optional
 
 from PyQt6 import QtCore, QtGui, QtWidgets
@@ -10,6 +10,7 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QFileDialog,
     QGroupBox,
+    QInputDialog,
     QMenu,
     QMessageBox,
     QSystemTrayIcon,
@@ -20,11 +21,22 @@ from PyQt6.QtWidgets import (
     QWidget,
     QGridLayout,
 )
-from qfluentwidgets import ComboBox as QFComboBox, PushButton, TextEdit
-
-from utils.update_utils import UpdateChecker
+from qfluentwidgets import ComboBox as QFComboBox, LineEdit, PushButton, TextEdit
+
+from utils.update_utils import (
+    BLACKLIST_FAILED,
+    BLACKLIST_UNCHANGED,
+    BLACKLIST_UPDATED,
+    UpdateChecker,
+    blacklists_update_running,
+)
+from utils.blacklist_scheduler import BlacklistScheduler
+from utils.config_catalog import ConfigCatalog, catalog_key
+from utils.domain_store import ensure_hostlists
+from utils.hostlist_index import get_hostlist_index
 from utils.utils import (
     BASE_FOLDER,
+    BLACKLIST_FILES,
     CURRENT_VERSION,
     ZAPRET_FOLDER,
     CONFIG_VERSION,
@@ -37,7 +49,6 @@ from utils.utils import (
     start_fix_process,
     enable_autostart,
     is_autostart_enabled,
-    load_script_options,
     open_path,
     set_language,
     tr,
@@ -61,15 +72,80 @@ DELETE_SRV_PATH = os.path.join(BASE_FOLDER, "resources", "icon", "delete_service
 FIX_PROCESS = os.path.join(BASE_FOLDER, "resources", "icon", "fix-process.png")
 PROXY = os.path.join(BASE_FOLDER, "resources", "icon", "proxy.png")
 
+# Результаты проверки по спискам передаются в интерфейс пачками, не реже раза в LOOKUP_BATCH_INTERVAL секунд
+LOOKUP_BATCH_SIZE = 500
+LOOKUP_BATCH_INTERVAL = 0.1
+# Сколько результатов проверки файла выводится в консоль; полный отчёт записывается в файл
+LOOKUP_CONSOLE_LIMIT = 200
+
 class UpdateBlacklistsThread(QtCore.QThread):
     def __init__(self, parent=None, silent=False):
         super().__init__(parent)
         self.silent = silent
         self.success = False
+        self.results = {}
+        self.changes = {}
 
     def run(self):
         update_checker = UpdateChecker()
         self.success = update_checker.update_blacklists()
+        self.results = update_checker.blacklist_results
+        self.changes = update_checker.blacklist_changes
+
+
+class HostlistLookupThread(QtCore.QThread):
+    """
+    Проверяет домены и адреса по индексу списков в фоне.
+    Принимает либо список записей, либо путь к файлу для пакетной проверки;
+    для файла полный отчёт записывается в <файл>.lookup.txt.
+    """
+    # Пачка результатов: [(запись, совпадения)]
+    result_signal = QtCore.pyqtSignal(list)
+    error_signal = QtCore.pyqtSignal(str)
+
+    def __init__(self, entries: Optional[List[str]] = None, file_path: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.entries = entries or []
+        self.file_path = file_path
+        self.report_path: Optional[str] = None
+        self.total = 0
+        self.found = 0
+
+    def run(self):
+        try:
+            index = get_hostlist_index()
+            if self.file_path:
+                report_path = os.path.splitext(self.file_path)[0] + ".lookup.txt"
+                with open(self.file_path, 'r', encoding='utf-8', errors='ignore') as f, \
+                        open(report_path, 'w', encoding='utf-8') as report:
+                    self.emit_batches(index.lookup_many(f), report)
+                self.report_path = report_path
+            else:
+                self.emit_batches(index.lookup_many(self.entries))
+        except Exception as e:
+            self.error_signal.emit(str(e))
+
+    def emit_batches(self, results, report=None) -> None:
+        batch = []
+        emitted_at = time.monotonic()
+        for entry, matches in results:
+            self.total += 1
+            self.found += bool(matches)
+            if report is not None:
+                report.write(format_lookup_result(entry, matches) + "\n")
+            batch.append((entry, matches))
+            if len(batch) >= LOOKUP_BATCH_SIZE or time.monotonic() - emitted_at >= LOOKUP_BATCH_INTERVAL:
+                self.result_signal.emit(batch)
+                batch = []
+                emitted_at = time.monotonic()
+        if batch:
+            self.result_signal.emit(batch)
+
+
+def format_lookup_result(entry: str, matches: list) -> str:
+    if matches:
+        return f"✅ {entry}: " + ", ".join(f"{name} ({match})" for name, match in matches)
+    return f"⛔ {entry}: {tr('не найден в списках')}"
 
 
 class CheckUpdatesThread(QtCore.QThread):
@@ -100,23 +176,29 @@ class DPIPenguin(QtWidgets.QMainWindow):
         self.autostart_enabled = is_autostart_enabled()
         self.autorun_with_last_config = settings.value("autorun_with_last_config", False, type=bool)
 
+        self.config_catalog = ConfigCatalog(self)
+        self.config_catalog.scan()
+
         if self.autorun_with_last_config:
             last_config_path = settings.value(
                 "last_config_path",
                 os.path.join(BASE_FOLDER, "config", "default.ini"),
             )
-            self.script_options, self.config_error = load_script_options(last_config_path)
+            self.script_options, self.config_error = self.config_catalog.load(last_config_path)
             self.current_config_path = last_config_path
         else:
             default_config_path = os.path.join(BASE_FOLDER, "config", "default.ini")
-            self.script_options, self.config_error = load_script_options(default_config_path)
+            self.script_options, self.config_error = self.config_catalog.load(default_config_path)
             self.current_config_path = default_config_path
 
         self.main_worker_thread: Optional[WorkerThread] = None
         self.winws_worker_thread: Optional[WorkerThread] = None
+        # Профиль, остановленный обновлением zapret до его перезапуска
+        self.update_suspended_thread: Optional[WorkerThread] = None
 
         self.init_ui()
         self.init_tray_icon()
+        self.config_catalog.catalog_changed_signal.connect(self.on_catalog_changed)
 
         if self.config_error:
             self.console_output.append(self.config_error)
@@ -131,6 +213,10 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         self.start_check_updates_thread()
 
+        self.blacklist_scheduler = BlacklistScheduler(self)
+        self.blacklist_scheduler.lists_changed_signal.connect(self.on_scheduled_lists_changed)
+        self.blacklist_scheduler.start()
+
         if self.autorun_with_last_config and not self.config_error:
             QTimer.singleShot(0, self.run_autorun)
         else:
@@ -143,14 +229,180 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
     def on_update_blacklists_finished(self):
         success = self.update_blacklists_thread.success
+        results = self.update_blacklists_thread.results
+        changes = self.update_blacklists_thread.changes
+        for name, status in results.items():
+            self.logger.info(f"{name}: {status}")
         if not self.update_blacklists_thread.silent:
+            details = self.format_blacklist_results(results, changes)
             if success:
-                QMessageBox.information(self, tr("Обновление"), tr("Черные списки успешно обновлены"))
+                QMessageBox.information(self, tr("Обновление"), tr("Черные списки успешно обновлены") + details)
             else:
-                QMessageBox.warning(self, tr("Обновление"), tr("Произошли ошибки при обновлении черных списков. Проверьте логи для подробностей."))
+                QMessageBox.warning(self, tr("Обновление"), tr("Произошли ошибки при обновлении черных списков. Проверьте логи для подробностей.") + details)
         if not success:
             self.logger.warning(tr("Произошли ошибки при обновлении черных списков"))
 
+    def rollback_blacklist(self) -> None:
+        """
+        Откатывает выбранный черный список к версии до последнего обновления по журналу.
+        """
+        if blacklists_update_running():
+            QMessageBox.information(self, tr("Откат"), tr("Дождитесь завершения обновления черных списков"))
+            return
+        update_checker = UpdateChecker()
+        choices = {}
+        for blacklist in update_checker.BLACKLISTS:
+            last = update_checker.journal.last(blacklist['name'])
+            if last is None or "added" not in last:
+                continue
+            changed_at = time.strftime("%d.%m.%Y %H:%M", time.localtime(last.get("time", 0)))
+            label = f"{blacklist['name']}: +{len(last['added'])} / −{len(last['removed'])} ({changed_at})"
+            choices[label] = blacklist
+        if not choices:
+            QMessageBox.information(self, tr("Откат"), tr("В журнале нет изменений, которые можно откатить"))
+            return
+        label, accepted = QInputDialog.getItem(
+            self, tr("Откат"), tr("Выберите черный список для отката:"), list(choices), 0, False
+        )
+        if not accepted:
+            return
+        blacklist = choices[label]
+        if not update_checker.rollback_blacklist(blacklist['name']):
+            QMessageBox.warning(self, tr("Откат"), tr("Не удалось откатить черный список. Проверьте логи для подробностей."))
+            return
+        self.console_output.append(tr("Черный список {name} откачен к предыдущей версии").format(name=blacklist['name']))
+        self.on_scheduled_lists_changed([blacklist['output_file']])
+
+    @pyqtSlot(list)
+    def on_scheduled_lists_changed(self, paths: list) -> None:
+        """
+        Перезапускает winws, если изменившиеся при плановом обновлении
+        списки используются запущенным профилем.
+
+        :param paths: Пути к изменившимся спискам.
+        """
+        if self.main_worker_thread is None:
+            return
+        arguments = os.path.normcase(" ".join(self.main_worker_thread.command))
+        used = [path for path in paths if os.path.normcase(path) in arguments]
+        if used:
+            self.logger.info(tr(f"Изменились используемые списки: {', '.join(os.path.basename(path) for path in used)}"))
+            self.restart_main_process()
+            self.console_output.append(tr("Черные списки обновлены, обход перезапущен"))
+
+    @pyqtSlot()
+    def on_update_processes_stopping(self) -> None:
+        """
+        Обновление zapret останавливает winws: отключаем обработчик завершения,
+        чтобы интерфейс не показал остановку обхода на время переключения.
+        """
+        self.update_suspended_thread = self.main_worker_thread
+        if self.update_suspended_thread is None:
+            return
+        try:
+            self.update_suspended_thread.finished_signal.disconnect(self.on_finished)
+        except TypeError:
+            pass
+
+    @pyqtSlot(list)
+    def on_update_processes_stopped(self, commands: list) -> None:
+        """
+        Перезапускает профиль, остановленный при обновлении zapret.
+        Процессы, запущенные не из программы, остаются остановленными.
+
+        :param commands: Командные строки процессов, остановленных обновлением.
+        """
+        thread, self.update_suspended_thread = self.update_suspended_thread, None
+        if thread is None or thread is not self.main_worker_thread:
+            return
+        process = thread.process
+        if process is not None and process.poll() is None:
+            # Процесс пережил переключение, возвращаем обработчик завершения
+            thread.finished_signal.connect(self.on_finished)
+            return
+        self.restart_main_process()
+        self.console_output.append(tr("Zapret обновлён, обход перезапущен"))
+
+    def restart_main_process(self, command: Optional[List[str]] = None) -> None:
+        """
+        Быстро перезапускает запущенный профиль.
+
+        :param command: Новая команда профиля; по умолчанию прежняя.
+        """
+        thread = self.main_worker_thread
+        if thread is None:
+            return
+        command, process_name = command or thread.command, thread.process_name
+        # Отключаем сигналы, чтобы завершение старого потока не сбросило состояние нового
+        for signal, slot in (
+            (thread.output_signal, self.update_output),
+            (thread.finished_signal, self.on_finished),
+            (thread.error_signal, self.handle_error),
+        ):
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+        started = time.perf_counter()
+        thread.terminate_process()
+        thread.quit()
+        thread.wait()
+        self.main_worker_thread = None
+        ensure_hostlists(BLACKLIST_FILES)
+        self.start_main_process(command, process_name, disable_run=True)
+        self.logger.info(tr(f"Профиль {process_name} перезапущен за {(time.perf_counter() - started) * 1000:.0f} мс"))
+
+    def reconcile_running_profile(self) -> None:
+        """
+        Сравнивает запущенный профиль с текущей конфигурацией: если исполняемый
+        файл и аргументы не изменились, обход продолжает работать, иначе
+        перезапускается только основной процесс.
+        """
+        thread = self.main_worker_thread
+        if thread is None:
+            return
+        profile = thread.process_name
+        if profile not in self.script_options:
+            self.logger.info(tr("Профиль {profile} отсутствует в конфигурации, обход остановлен").format(profile=profile))
+            self.console_output.append(
+                tr("Профиль {profile} отсутствует в конфигурации, обход остановлен").format(profile=tr(profile))
+            )
+            self.stop_running_processes()
+            return
+        executable, args = self.script_options[profile]
+        command = [executable] + args
+        if command == thread.command:
+            self.logger.info(tr("Профиль {profile} не изменился, обход продолжает работать").format(profile=profile))
+            self.console_output.append(
+                tr("Профиль {profile} не изменился, обход продолжает работать").format(profile=tr(profile))
+            )
+            return
+        self.restart_main_process(command)
+        self.console_output.append(tr("Профиль {profile} изменился, обход перезапущен").format(profile=tr(profile)))
+
+    def format_blacklist_results(self, results: dict, changes: Optional[dict] = None) -> str:
+        """
+        Формирует список состояний черных списков для вывода пользователю.
+
+        :param results: Словарь {имя списка: статус}.
+        :param changes: Словарь {имя списка: (добавлено, удалено)}.
+        :return: Текст с результатами по каждому источнику.
+        """
+        status_names = {
+            BLACKLIST_UNCHANGED: tr("без изменений"),
+            BLACKLIST_UPDATED: tr("обновлён"),
+            BLACKLIST_FAILED: tr("ошибка"),
+        }
+        changes = changes or {}
+        lines = []
+        for name, status in results.items():
+            line = f"{name}: {status_names.get(status, status)}"
+            if name in changes:
+                added, removed = changes[name]
+                line += f" (+{added} / −{removed})"
+            lines.append(line)
+        return "\n\n" + "\n".join(lines) if lines else ""
+
     def start_check_updates_thread(self):
         self.check_updates_thread = CheckUpdatesThread()
         self.check_updates_thread.updates_available_signal.connect(self.on_updates_checked)
@@ -310,6 +562,13 @@ class DPIPenguin(QtWidgets.QMainWindow):
         process_layout = QVBoxLayout(process_tab)
         script_layout = QHBoxLayout()
 
+        # Все конфигурации из каталога; переключение без диалога и повторного чтения файла
+        self.selected_config = QFComboBox()
+        self.selected_config.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Preferred)
+        self.update_config_list()
+        self.selected_config.currentIndexChanged.connect(self.on_config_selected)
+        script_layout.addWidget(self.selected_config)
+
         self.selected_script = QFComboBox()
         if not self.config_error:
             for script_name in self.script_options.keys():
@@ -325,6 +584,13 @@ class DPIPenguin(QtWidgets.QMainWindow):
         self.update_config_button.setFixedWidth(40)
         script_layout.addWidget(self.update_config_button)
 
+        self.add_config_folder_button = PushButton("🗂", self)
+        self.add_config_folder_button.setToolTip(tr("Добавить папку с конфигурациями"))
+        self.add_config_folder_button.clicked.connect(self.add_config_folder_via_dialog)
+        self.add_config_folder_button.setSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        self.add_config_folder_button.setFixedWidth(40)
+        script_layout.addWidget(self.add_config_folder_button)
+
         # Кнопка "Конвертер"
         self.converter_button = PushButton("📜", self)
         self.converter_button.setToolTip(tr("Открыть окно конвертера"))
@@ -332,12 +598,34 @@ class DPIPenguin(QtWidgets.QMainWindow):
         self.converter_button.setSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
         script_layout.addWidget(self.converter_button)
 
-        script_layout.setStretch(0, 1)  
-        script_layout.setStretch(1, 0)  
+        script_layout.setStretch(0, 1)
+        script_layout.setStretch(1, 1)
         script_layout.setStretch(2, 0)
+        script_layout.setStretch(3, 0)
 
         process_layout.addLayout(script_layout)
 
+        # Поиск домена или адреса в списках
+        lookup_layout = QHBoxLayout()
+        self.lookup_input = LineEdit(self)
+        self.lookup_input.setPlaceholderText(tr("Проверить домен или IP в списках..."))
+        self.lookup_input.returnPressed.connect(self.lookup_entry)
+        lookup_layout.addWidget(self.lookup_input)
+
+        self.lookup_button = PushButton("🔍", self)
+        self.lookup_button.setToolTip(tr("Проверить наличие в списках"))
+        self.lookup_button.clicked.connect(self.lookup_entry)
+        self.lookup_button.setFixedWidth(40)
+        lookup_layout.addWidget(self.lookup_button)
+
+        self.bulk_lookup_button = PushButton("📄", self)
+        self.bulk_lookup_button.setToolTip(tr("Проверить файл со списком доменов и IP"))
+        self.bulk_lookup_button.clicked.connect(self.lookup_file)
+        self.bulk_lookup_button.setFixedWidth(40)
+        lookup_layout.addWidget(self.bulk_lookup_button)
+
+        process_layout.addLayout(lookup_layout)
+
         # Кнопки управления процессами
         buttons_layout = QHBoxLayout()
         self.run_button = self.create_button(tr("Запустить"), self.run_exe, buttons_layout)
@@ -383,6 +671,62 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         return process_tab
     
+    def lookup_entry(self) -> None:
+        """
+        Проверяет введённый домен или адрес по индексу списков.
+        """
+        entry = self.lookup_input.text().strip()
+        if entry:
+            self.start_lookup_thread(entries=[entry])
+
+    def lookup_file(self) -> None:
+        """
+        Пакетно проверяет файл с доменами и адресами (по одному в строке).
+        """
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            tr("Выберите файл со списком доменов и IP"),
+            "",
+            "Text Files (*.txt);;All Files (*)"
+        )
+        if file_path:
+            self.console_output.append(tr("Проверка файла: {path}").format(path=file_path))
+            self.start_lookup_thread(file_path=file_path)
+
+    def start_lookup_thread(self, entries: Optional[List[str]] = None, file_path: Optional[str] = None) -> None:
+        if getattr(self, 'lookup_thread', None) is not None and self.lookup_thread.isRunning():
+            return
+        self.lookup_shown = 0
+        self.lookup_thread = HostlistLookupThread(entries=entries, file_path=file_path)
+        self.lookup_thread.result_signal.connect(self.on_lookup_results)
+        self.lookup_thread.error_signal.connect(self.handle_error)
+        self.lookup_thread.finished.connect(self.on_lookup_finished)
+        self.lookup_thread.start()
+
+    @pyqtSlot(list)
+    def on_lookup_results(self, results: list) -> None:
+        """
+        Выводит пачку результатов проверки в консоль; для файла — не больше LOOKUP_CONSOLE_LIMIT строк.
+        """
+        if self.lookup_thread.file_path:
+            results = results[:max(0, LOOKUP_CONSOLE_LIMIT - self.lookup_shown)]
+        if results:
+            self.lookup_shown += len(results)
+            self.console_output.append("\n".join(format_lookup_result(entry, matches) for entry, matches in results))
+
+    def on_lookup_finished(self) -> None:
+        """
+        Выводит итог пакетной проверки файла и путь к полному отчёту.
+        """
+        thread = self.lookup_thread
+        if not thread.file_path or thread.report_path is None:
+            return
+        self.console_output.append(
+            tr("Проверено записей: {total}, найдено в списках: {found}. Полный отчёт: {path}").format(
+                total=thread.total, found=thread.found, path=thread.report_path
+            )
+        )
+
     def open_converter(self):
         self.converter_window = ConfigConverterDialog(self)
         self.converter_window.show()
@@ -471,6 +815,11 @@ class DPIPenguin(QtWidgets.QMainWindow):
         self.update_blacklists_on_start_checkbox.toggled.connect(self.toggle_update_blacklists_on_start)
         autostart_layout.addWidget(self.update_blacklists_on_start_checkbox)
 
+        self.blacklists_auto_refresh_checkbox = QCheckBox(tr("Обновлять черные списки в фоне"))
+        self.blacklists_auto_refresh_checkbox.setChecked(BlacklistScheduler.is_enabled())
+        self.blacklists_auto_refresh_checkbox.toggled.connect(self.toggle_blacklists_auto_refresh)
+        autostart_layout.addWidget(self.blacklists_auto_refresh_checkbox)
+
         # Настройка шрифта для чекбоксов
         font = self.tray_checkbox.font()
         font.setPointSize(9)
@@ -478,6 +827,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
         self.autostart_checkbox.setFont(font)
         self.autorun_with_last_config_checkbox.setFont(font)
         self.update_blacklists_on_start_checkbox.setFont(font)
+        self.blacklists_auto_refresh_checkbox.setFont(font)
 
         settings_layout.addWidget(self.autostart_group)
 
@@ -528,8 +878,18 @@ class DPIPenguin(QtWidgets.QMainWindow):
             icon_size=(16, 16)
         )
 
+        self.rollback_blacklists_button = self.create_button(
+            text=tr("Откатить черный список"),
+            func=self.rollback_blacklist,
+            layout=updates_layout,
+            icon_path=BLACK_ICON_PATH,
+            icon_size=(16, 16),
+            tooltip=tr("Возвращает версию списка до последнего обновления без повторной загрузки")
+        )
+
         updates_layout.addWidget(self.open_additional_settings_button)
         updates_layout.addWidget(self.update_blacklists_button)
+        updates_layout.addWidget(self.rollback_blacklists_button)
 
         settings_layout.addWidget(self.updates_group)
 
@@ -594,6 +954,62 @@ class DPIPenguin(QtWidgets.QMainWindow):
             if index >= 0:
                 self.selected_script.setCurrentIndex(index)
 
+    def update_config_list(self) -> None:
+        """
+        Обновляет список конфигураций из каталога; конфигурации с ошибками помечаются знаком ⚠.
+        """
+        self.selected_config.blockSignals(True)
+        self.selected_config.clear()
+        entries = sorted(self.config_catalog.entries.values(), key=lambda entry: entry.name.lower())
+        for entry in entries:
+            label = entry.name if entry.is_valid else f"{entry.name} ⚠"
+            self.selected_config.addItem(label, userData=entry.path)
+        current_key = catalog_key(self.current_config_path)
+        for index, entry in enumerate(entries):
+            if catalog_key(entry.path) == current_key:
+                self.selected_config.setCurrentIndex(index)
+                break
+        self.selected_config.blockSignals(False)
+
+    def on_config_selected(self) -> None:
+        """
+        Переключает конфигурацию, выбранную в списке, используя уже загруженные профили.
+        """
+        path = self.selected_config.currentData()
+        if not path or catalog_key(path) == catalog_key(self.current_config_path):
+            return
+        entry = self.config_catalog.entry(path)
+        if entry is None:
+            return
+        if not entry.is_valid:
+            self.console_output.append(entry.error)
+            self.logger.error(entry.error)
+            self.update_config_list()
+            return
+        self.logger.info(f"{tr('Выбран файл конфигурации')}: {path}")
+        self.apply_config(path, entry.script_options)
+
+    def on_catalog_changed(self, paths: list) -> None:
+        """
+        Обновляет список конфигураций и профили текущей конфигурации после изменения файлов.
+        """
+        self.update_config_list()
+        current_key = catalog_key(self.current_config_path)
+        if not any(catalog_key(path) == current_key for path in paths):
+            return
+        entry = self.config_catalog.entry(self.current_config_path)
+        if entry is None or not entry.is_valid:
+            # Запущенный обход продолжает работать с прежними аргументами
+            error = entry.error if entry is not None else f"{tr('Файл не найден')}: {self.current_config_path}"
+            self.config_error = error
+            self.console_output.append(error)
+            self.logger.error(error)
+            self.selected_script.setEnabled(False)
+            self.run_button.setEnabled(False)
+            return
+        self.logger.info(tr("Конфигурация {path} перечитана").format(path=self.current_config_path))
+        self.apply_config(self.current_config_path, entry.script_options)
+
     def create_info_tab(self) -> QWidget:
         """
         Создаёт вкладку "О программе" с информацией о приложении и зависимостях.
@@ -766,6 +1182,15 @@ class DPIPenguin(QtWidgets.QMainWindow):
         settings.setValue("update_blacklists_on_start", checked)
         self.logger.info(f"{tr('Обновление черных списков при запуске программы')} {'включено' if checked else 'отключено'}")
 
+    def toggle_blacklists_auto_refresh(self, checked: bool) -> None:
+        """
+        Включает или отключает плановое обновление черных списков в фоне.
+
+        :param checked: Состояние чекбокса.
+        """
+        settings.setValue("blacklists_auto_refresh", checked)
+        self.logger.info(f"{tr('Фоновое обновление черных списков')} {'включено' if checked else 'отключено'}")
+
     def create_button(self, text, func, layout, enabled=True, icon_path=None, icon_size=(24, 24), tooltip=None):
         button = PushButton(text, self)
         button.setEnabled(enabled)
@@ -818,6 +1243,8 @@ class DPIPenguin(QtWidgets.QMainWindow):
         if not self.is_executable_available(executable, selected_option):
             return
 
+        ensure_hostlists(BLACKLIST_FILES)
+
         translated_option = tr(selected_option)
         clear_console_text = tr("Установка: {option} запущена...").format(option=translated_option)
 
@@ -943,7 +1370,10 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         :param process_name: Имя завершившегося процесса.
         """
-        if process_name in self.script_options or process_name == "winws.exe":
+        if self.update_suspended_thread is not None and self.sender() is self.update_suspended_thread:
+            # Сигнал мог попасть в очередь до отключения: процесс перезапустит on_update_processes_stopped
+            return
+        if process_name in (self.script_options or {}) or process_name == "winws.exe":
             if process_name == "winws.exe":
                 self.logger.info(f"{tr('Процесс')} {process_name} {tr('завершён')}")
             else:
@@ -984,6 +1414,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
         Завершает все запущенные процессы и закрывает приложение.
         """
         self.logger.info(tr("Начата процедура остановки и закрытия процессов"))
+        self.blacklist_scheduler.stop()
 
         if self.main_worker_thread is not None:
             self.logger.info(tr("Завершение работы основного WorkerThread"))
@@ -1045,28 +1476,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
         if file_path:
             self.logger.info(f"{tr('Выбран файл конфигурации')}: {file_path}")
 
-            if self.main_worker_thread is not None:
-                self.logger.info(tr("Завершение работы WorkerThread перед загрузкой новой конфигурации"))
-                self.main_worker_thread.terminate_process()
-                self.main_worker_thread.quit()
-                self.main_worker_thread.wait()
-                self.main_worker_thread = None
-
-            if self.winws_worker_thread is not None:
-                self.logger.info(tr("Завершение работы WorkerThread для winws.exe перед загрузкой новой конфигурации"))
-                self.winws_worker_thread.terminate_process()
-                self.winws_worker_thread.quit()
-                self.winws_worker_thread.wait()
-                self.winws_worker_thread = None
-
-            validation_error = self.validate_config_file(file_path)
-            if validation_error:
-                self.console_output.append(validation_error)
-                self.logger.error(validation_error)
-                QMessageBox.critical(self, tr("Ошибка загрузки конфигурации"), validation_error)
-                return
-
-            new_script_options, new_config_error = load_script_options(file_path)
+            new_script_options, new_config_error = self.config_catalog.load(file_path)
 
             if new_config_error:
                 self.console_output.append(new_config_error)
@@ -1074,64 +1484,68 @@ class DPIPenguin(QtWidgets.QMainWindow):
                 QMessageBox.critical(self, tr("Ошибка загрузки конфигурации"), new_config_error)
                 return
 
-            self.script_options = new_script_options
-            self.config_error = None
-            self.current_config_path = file_path
-            self.console_output.append(tr("Конфигурация успешно загружена"))
-
-            self.update_script_options_display()
-            self.selected_script.setEnabled(True)
-            self.run_button.setEnabled(True)
-            self.stop_close_button.setEnabled(False)
-
-            if self.autorun_with_last_config:
-                settings.setValue("last_config_path", file_path)
+            self.config_catalog.add_file(file_path)
+            self.apply_config(file_path, new_script_options)
 
-    def validate_config_file(self, file_path: str) -> Optional[str]:
+    def add_config_folder_via_dialog(self) -> None:
         """
-        Валидирует файл конфигурации на соответствие необходимым требованиям.
-
-        :param file_path: Путь к файлу конфигурации.
-        :return: Сообщение об ошибке или None, если ошибок нет.
+        Добавляет выбранную папку в каталог конфигураций; её файлы появляются в списке
+        и отслеживаются так же, как файлы из config/.
         """
-        if not os.path.exists(file_path):
-            error_msg = f"{tr('Файл не найден')}: {file_path}"
-            self.logger.error(error_msg)
-            return error_msg
+        folder = QFileDialog.getExistingDirectory(self, tr("Выберите папку с конфигурациями"))
+        if not folder:
+            return
+        self.config_catalog.add_folder(folder)
+        folder_key = catalog_key(folder)
+        count = sum(
+            1 for entry in self.config_catalog.entries.values()
+            if catalog_key(os.path.dirname(entry.path)) == folder_key
+        )
+        self.console_output.append(
+            tr("Добавлена папка {path}, конфигураций: {count}").format(path=folder, count=count)
+        )
 
-        if not os.access(file_path, os.R_OK):
-            error_msg = f"{tr('Недостаточно прав для чтения файла')}: {file_path}"
-            self.logger.error(error_msg)
-            return error_msg
+    def stop_running_processes(self) -> None:
+        """
+        Останавливает запущенные процессы перед сменой конфигурации.
+        """
+        if self.main_worker_thread is not None:
+            self.logger.info(tr("Завершение работы WorkerThread перед загрузкой новой конфигурации"))
+            self.main_worker_thread.terminate_process()
+            self.main_worker_thread.quit()
+            self.main_worker_thread.wait()
+            self.main_worker_thread = None
 
-        config = configparser.ConfigParser()
-        try:
-            config.read(file_path, encoding='utf-8')
-        except Exception as e:
-            error_msg = f"{tr('Ошибка при чтении файла INI')}: {e}"
-            self.logger.error(error_msg)
-            return error_msg
+        if self.winws_worker_thread is not None:
+            self.logger.info(tr("Завершение работы WorkerThread для winws.exe перед загрузкой новой конфигурации"))
+            self.winws_worker_thread.terminate_process()
+            self.winws_worker_thread.quit()
+            self.winws_worker_thread.wait()
+            self.winws_worker_thread = None
 
-        if 'SCRIPT_OPTIONS' not in config.sections():
-            error_msg = tr("Ошибка: Отсутствует секция [SCRIPT_OPTIONS] в конфигурационном файле")
-            self.logger.error(error_msg)
-            return error_msg
+    def apply_config(self, file_path: str, script_options: dict) -> None:
+        """
+        Делает конфигурацию текущей и обновляет элементы управления.
+        Запущенный профиль перезапускается, только если его команда изменилась.
 
-        script_sections = [section for section in config.sections() if section != 'SCRIPT_OPTIONS']
-        if not script_sections:
-            error_msg = tr("Ошибка: В секции [SCRIPT_OPTIONS] отсутствуют настройки скриптов")
-            self.logger.error(error_msg)
-            return error_msg
+        :param file_path: Путь к файлу конфигурации.
+        :param script_options: Загруженные профили конфигурации.
+        """
+        self.script_options = script_options
+        self.config_error = None
+        self.current_config_path = file_path
+        self.console_output.append(tr("Конфигурация успешно загружена"))
 
-        required_keys = ['executable', 'args']
-        for section in script_sections:
-            for key in required_keys:
-                if key not in config[section]:
-                    error_msg = f"{tr('Ошибка')}: {tr('В секции')} [{section}] {tr('отсутствует ключ')} '{key}'"
-                    self.logger.error(error_msg)
-                    return error_msg
+        self.update_config_list()
+        self.update_script_options_display()
+        self.selected_script.setEnabled(True)
+        self.reconcile_running_profile()
+        running = self.main_worker_thread is not None
+        self.run_button.setEnabled(not running)
+        self.stop_close_button.setEnabled(running)
 
-        return None
+        if self.autorun_with_last_config:
+            settings.setValue("last_config_path", file_path)
 
     def open_settings_dialog(self) -> None:
         """
@@ -1139,6 +1553,8 @@ class DPIPenguin(QtWidgets.QMainWindow):
         """
         dialog = SettingsDialog(self)
         dialog.config_updated_signal.connect(self.reload_configuration)
+        dialog.processes_stopping_signal.connect(self.on_update_processes_stopping)
+        dialog.processes_stopped_signal.connect(self.on_update_processes_stopped)
         dialog.exec()
 
     def open_proxy_settings_dialog(self) -> None:
@@ -1150,32 +1566,12 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
     def reload_configuration(self) -> None:
         """
-        Перезагружает конфигурацию после обновления.
+        Перезагружает конфигурацию после обновления. Изменённые файлы применяет
+        on_catalog_changed, как и при правке вручную, поэтому конфигурация
+        применяется один раз, даже если изменение уже заметил QFileSystemWatcher.
         """
-        # Останавливаем текущие запущенные процессы
-        if self.main_worker_thread is not None:
-            self.main_worker_thread.terminate_process()
-            self.main_worker_thread.quit()
-            self.main_worker_thread.wait()
-            self.main_worker_thread = None
-
-        if self.winws_worker_thread is not None:
-            self.winws_worker_thread.terminate_process()
-            self.winws_worker_thread.quit()
-            self.winws_worker_thread.wait()
-            self.winws_worker_thread = None
-
-        # Перезагрузка конфигурации
-        self.script_options, self.config_error = load_script_options(self.current_config_path)
-        if self.config_error:
-            self.console_output.append(self.config_error)
-            self.logger.error(self.config_error)
-            self.selected_script.setEnabled(False)
-            self.run_button.setEnabled(False)
-        else:
-            self.update_script_options_display()
-            self.selected_script.setEnabled(True)
-            self.run_button.setEnabled(True)
+        self.config_catalog.rescan_timer.stop()
+        self.config_catalog.rescan()
         QMessageBox.information(self, tr("Обновление"), tr("Конфигурация обновлена и перезагружена"))
 
     def start_winws(self, winws_path: str, args: Optional[List[str]] = None) -> None:
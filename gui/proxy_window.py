@@ -8,6 +8,7 @@ from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QProgressBar, QMessageBox, QCheckBox, QGroupBox
 from qfluentwidgets import PushButton, TextEdit, ComboBox as QFComboBox
 
+from utils.http_client import PROBE_TIMEOUT, get_session
 from utils.utils import tr
 
 # Настройка логирования
@@ -55,7 +56,7 @@ class ProxyTester(QThread):
         """Запуск тестирования прокси."""
         try:
             proxies = self.construct_proxies()
-            response = requests.get("http://httpbin.org/ip", proxies=proxies, timeout=5)
+            response = get_session(retries=False).get("http://httpbin.org/ip", proxies=proxies, timeout=PROBE_TIMEOUT)
 
             if 200 <= response.status_code < 300:
                 self.test_result.emit(1)
@@ -2,24 +2,110 @@ import logging
 import os
 import sys
 import subprocess
-from typing import Any, Optional
+import time
+from typing import Any, List, Optional
 
-from PyQt6.QtCore import pyqtSignal, pyqtSlot
+from PyQt6.QtCore import QThread, pyqtSignal, pyqtSlot
 from PyQt6.QtWidgets import (
     QDialog,
     QHBoxLayout,
     QMessageBox,
+    QProgressBar,
     QVBoxLayout,
 )
 from qfluentwidgets import PushButton, TextEdit
+from utils.http_client import format_speed
 from utils.utils import tr
 from utils.update_utils import UpdateChecker
 
+# Потоки закрытых диалогов: хранятся до сигнала finished, чтобы не ждать сеть при закрытии окна
+_detached_threads = set()
+
+
+def release_on_finish(thread: QThread) -> None:
+    """
+    Отвязывает работающий поток от закрываемого окна и освобождает его по завершении.
+    """
+    thread.setParent(None)
+    _detached_threads.add(thread)
+    thread.finished.connect(lambda: _detached_threads.discard(thread))
+    thread.finished.connect(thread.deleteLater)
+    if thread.isFinished():
+        _detached_threads.discard(thread)
+        thread.deleteLater()
+
+
+class VersionCheckThread(QThread):
+    """
+    Получает локальные и удалённые версии компонентов в фоне.
+    """
+    versions_checked_signal = pyqtSignal()
+
+    def __init__(self, update_checker: UpdateChecker, parent=None):
+        super().__init__(parent)
+        self.update_checker = update_checker
+
+    def run(self):
+        self.update_checker.get_local_versions()
+        self.update_checker.get_remote_versions()
+        if not self.update_checker.cancel_event.is_set():
+            self.versions_checked_signal.emit()
+
+    def cancel(self) -> None:
+        """
+        Запрашивает прекращение проверки перед следующим сетевым запросом.
+        """
+        self.update_checker.cancel_event.set()
+
+
+class ComponentUpdateThread(QThread):
+    """
+    Загружает и устанавливает обновления компонентов в фоне.
+    """
+    progress_signal = pyqtSignal(str, int, int)
+    finished_signal = pyqtSignal(bool, str)
+
+    def __init__(self, update_checker: UpdateChecker, components: List[str], dialog=None, parent=None):
+        super().__init__(parent)
+        self.update_checker = update_checker
+        self.components = components
+        self.dialog = dialog
+
+    def run(self):
+        self.update_checker.cancel_event.clear()
+        self.update_checker.progress_callback = self.report_progress
+        try:
+            for component in self.components:
+                if not self.update_checker.is_update_available(component):
+                    continue
+                if not self.update_checker.download_and_update(component, dialog=self.dialog):
+                    if self.update_checker.cancel_event.is_set():
+                        self.finished_signal.emit(False, tr("Обновление отменено"))
+                    else:
+                        self.finished_signal.emit(False, tr("Не удалось обновить {component}").format(component=component))
+                    return
+            self.finished_signal.emit(True, "")
+        finally:
+            self.update_checker.progress_callback = None
+
+    def report_progress(self, component: str, done: int, total: Optional[int]) -> None:
+        self.progress_signal.emit(component, done, total or 0)
+
+    def cancel(self) -> None:
+        """
+        Запрашивает отмену текущей загрузки.
+        """
+        self.update_checker.cancel_event.set()
+
+
 class SettingsDialog(QDialog):
     """
     Диалоговое окно для управления обновлениями приложения.
     """
     config_updated_signal = pyqtSignal()
+    # Пересылаются из UpdateChecker, чтобы главное окно перезапустило свои процессы
+    processes_stopping_signal = pyqtSignal()
+    processes_stopped_signal = pyqtSignal(list)
 
     def __init__(self, parent: Optional[Any] = None):
         """
@@ -46,49 +132,122 @@ class SettingsDialog(QDialog):
         self.update_button.clicked.connect(self.on_update)
         button_layout.addWidget(self.update_button)
 
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
         self.close_button = PushButton(tr("Закрыть"), self)
         self.close_button.clicked.connect(self.close)
         button_layout.addWidget(self.close_button)
 
+        self.cancel_button = PushButton(tr("Отмена"), self)
+        self.cancel_button.clicked.connect(self.on_cancel)
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.cancel_button)
+
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
         self.initial_check_done = False
+        self.update_thread: Optional[ComponentUpdateThread] = None
+        self.transfer_started = {}
         self.update_checker = UpdateChecker()
-        self.update_checker.get_local_versions()
-        self.update_checker.get_remote_versions()
-        self.check_for_updates()
+        self.update_button.setEnabled(False)
+        self.text_edit.append(tr("🔄 Проверка обновлений..."))
 
         # Подключение сигнала обновления конфигурации
         self.update_checker.config_updated_signal.connect(self.on_config_updated)
+        self.update_checker.processes_stopping_signal.connect(self.processes_stopping_signal)
+        self.update_checker.processes_stopped_signal.connect(self.processes_stopped_signal)
+
+        self.version_check_thread = VersionCheckThread(self.update_checker, self)
+        self.version_check_thread.versions_checked_signal.connect(self.check_for_updates)
+        self.version_check_thread.start()
 
     @pyqtSlot()
     def on_update(self) -> None:
         """
         Обработчик события нажатия кнопки обновления.
-        Выполняет обновление компонентов и информирует пользователя о результате.
+        Запускает обновление компонентов в фоновом потоке.
         """
-        try:
-            self.update_component('zapret')
-            self.update_component('config')
+        self.update_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.transfer_started = {}
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+
+        self.update_thread = ComponentUpdateThread(self.update_checker, ['zapret', 'config'], dialog=self, parent=self)
+        self.update_thread.progress_signal.connect(self.on_update_progress)
+        self.update_thread.finished_signal.connect(self.on_update_finished)
+        self.update_thread.start()
+
+    @pyqtSlot(str, int, int)
+    def on_update_progress(self, component: str, done: int, total: int) -> None:
+        """
+        Отображает прогресс загрузки компонента, скорость и оставшееся время.
+        """
+        now = time.monotonic()
+        started_at, started_done = self.transfer_started.setdefault(component, (now, done))
+        elapsed = now - started_at
+        speed = (done - started_done) / elapsed if elapsed > 0.5 else 0.0
+
+        text = f"{component}: "
+        if total > 0:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(min(100, done * 100 // total))
+            text += "%p%"
+        else:
+            self.progress_bar.setRange(0, 0)
+            text += f"{done // 1024} {tr('КБ')}"
+        if speed > 0:
+            text += f" — {format_speed(speed)}"
+            if total > done:
+                text += " — " + tr("осталось {seconds} с").format(seconds=int((total - done) / speed) + 1)
+        self.progress_bar.setFormat(text)
 
-            # Если обновления прошли успешно
+    @pyqtSlot(bool, str)
+    def on_update_finished(self, success: bool, message: str) -> None:
+        """
+        Информирует пользователя о результате обновления.
+        """
+        self.progress_bar.setVisible(False)
+        self.cancel_button.setEnabled(False)
+        if success:
             QMessageBox.information(self, tr("Обновление"), tr("Обновление выполнено успешно!"))
-            self.close_and_open_main_window()
+        elif self.update_checker.cancel_event.is_set():
+            self.text_edit.append(message)
+            self.update_button.setEnabled(True)
+            return
+        else:
+            QMessageBox.critical(self, tr("Ошибка обновления"), tr(f"Ошибка обновления: {message}"))
+        self.close_and_open_main_window()
 
-        except Exception as e:
-            # В случае ошибки показать уведомление
-            QMessageBox.critical(self, tr("Ошибка обновления"), tr(f"Ошибка обновления: {e}"))
-            self.close_and_open_main_window()
+    @pyqtSlot()
+    def on_cancel(self) -> None:
+        """
+        Отменяет текущую загрузку обновления.
+        """
+        if self.update_thread is not None and self.update_thread.isRunning():
+            self.cancel_button.setEnabled(False)
+            self.update_thread.cancel()
 
-    def update_component(self, component: str) -> None:
+    def closeEvent(self, event) -> None:
         """
-        Обновляет указанный компонент (например, 'zapret' или 'config').
-        :param component: Имя компонента для обновления.
+        При закрытии окна отменяет фоновые потоки, не дожидаясь их завершения:
+        поток прекращает работу перед следующим запросом или блоком данных.
         """
-        if self.update_checker.is_update_available(component):
-            if not self.update_checker.download_and_update(component, dialog=self):
-                raise Exception(f"Не удалось обновить {component}")
+        for thread in (self.version_check_thread, self.update_thread):
+            if thread is None or not thread.isRunning():
+                continue
+            thread.cancel()
+            if isinstance(thread, ComponentUpdateThread):
+                thread.progress_signal.disconnect()
+                thread.finished_signal.disconnect()
+                thread.dialog = None
+            else:
+                thread.versions_checked_signal.disconnect()
+            release_on_finish(thread)
+        super().closeEvent(event)
 
     def check_for_updates(self) -> None:
         """
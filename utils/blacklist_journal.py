@@ -0,0 +1,167 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.domain_store import read_domain_list
+from utils.download_utils import atomic_replace, discard_temp, stream_to_temp
+from utils.utils import BASE_FOLDER, tr
+
+logger = logging.getLogger("BlacklistJournal")
+
+JOURNAL_FOLDER = os.path.join(BASE_FOLDER, "setting_version", "journal")
+
+# Ограничения журнала одного источника
+MAX_JOURNAL_ENTRIES = 20
+MAX_JOURNAL_BYTES = 512 * 1024
+
+
+def read_sorted_entries(path: str) -> List[str]:
+    """
+    Читает записи списка в отсортированном виде. Уже отсортированные
+    файлы (после минимизации) проверяются за один проход без пересортировки.
+    """
+    if not os.path.exists(path):
+        return []
+    entries = list(read_domain_list(path))
+    if any(entries[i] > entries[i + 1] for i in range(len(entries) - 1)):
+        entries.sort()
+    return entries
+
+
+def sorted_merge_diff(old: List[str], new: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Линейное сравнение двух отсортированных списков слиянием.
+
+    :return: Добавленные и удалённые записи.
+    """
+    added: List[str] = []
+    removed: List[str] = []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            i += 1
+            j += 1
+        elif old[i] < new[j]:
+            if not removed or removed[-1] != old[i]:
+                removed.append(old[i])
+            i += 1
+        else:
+            if not added or added[-1] != new[j]:
+                added.append(new[j])
+            j += 1
+    removed.extend(old[i:])
+    added.extend(new[j:])
+    return added, removed
+
+
+def diff_files(old_path: str, new_path: str) -> Tuple[List[str], List[str]]:
+    """
+    Сравнивает текущий и новый файл списка.
+    """
+    return sorted_merge_diff(read_sorted_entries(old_path), read_sorted_entries(new_path))
+
+
+class BlacklistJournal:
+    """
+    Журнал изменений черных списков: для каждого источника хранится
+    ограниченная по размеру история различий между обновлениями в сжатом виде.
+    Последнее изменение можно откатить без повторной загрузки.
+    """
+
+    def __init__(self, folder: str = JOURNAL_FOLDER):
+        self.folder = folder
+        self.lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, f"{name}.json.gz")
+
+    def load(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Возвращает записи журнала источника, от старых к новым.
+        """
+        path = self._path(name)
+        if not os.path.exists(path):
+            return []
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, list) else []
+        except (OSError, ValueError) as e:
+            logger.warning(tr(f"Не удалось прочитать журнал {path}: {e}"))
+            return []
+
+    @staticmethod
+    def _compress(entries: List[Dict[str, Any]]) -> bytes:
+        return gzip.compress(json.dumps(entries, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def _save(self, name: str, entries: List[Dict[str, Any]]) -> None:
+        path = self._path(name)
+        while True:
+            data = self._compress(entries)
+            if len(data) <= MAX_JOURNAL_BYTES or not entries:
+                break
+            entries = entries[1:]
+        temp_path, _, _ = stream_to_temp([data], path)
+        try:
+            atomic_replace(temp_path, path)
+        except BaseException:
+            discard_temp(temp_path)
+            raise
+
+    def record(self, name: str, added: List[str], removed: List[str]) -> None:
+        """
+        Добавляет изменение в журнал источника.
+        """
+        if not added and not removed:
+            return
+        entry = {"time": int(time.time()), "added": added, "removed": removed}
+        if len(self._compress([entry])) > MAX_JOURNAL_BYTES:
+            # Изменение больше всего журнала: сохраняются только счётчики, откат его недоступен
+            logger.info(tr(f"{name}: изменение слишком большое для журнала, сохранены только счётчики"))
+            entry = {"time": entry["time"], "added_count": len(added), "removed_count": len(removed)}
+        with self.lock:
+            entries = self.load(name)
+            entries.append(entry)
+            self._save(name, entries[-MAX_JOURNAL_ENTRIES:])
+
+    def last(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает последнее изменение источника или None.
+        """
+        entries = self.load(name)
+        return entries[-1] if entries else None
+
+    def rollback(self, name: str, path: str) -> bool:
+        """
+        Восстанавливает предыдущую версию списка, обращая последнее изменение.
+
+        :param name: Имя источника.
+        :param path: Путь к текущему файлу списка.
+        :return: True, если откат выполнен.
+        """
+        with self.lock:
+            entries = self.load(name)
+            if not entries:
+                logger.warning(tr(f"Журнал {name} пуст, откат невозможен"))
+                return False
+            if "added" not in entries[-1]:
+                logger.warning(tr(f"Последнее изменение {name} сохранено без записей, откат невозможен"))
+                return False
+            last = entries.pop()
+            added = set(last.get("added", []))
+            previous = [entry for entry in read_sorted_entries(path) if entry not in added]
+            previous = sorted(set(previous).union(last.get("removed", [])))
+            data = "".join(entry + "\n" for entry in previous).encode("utf-8")
+            temp_path, _, _ = stream_to_temp([data], path)
+            try:
+                atomic_replace(temp_path, path)
+            except BaseException:
+                discard_temp(temp_path)
+                raise
+            self._save(name, entries)
+        logger.info(tr(f"{name}: выполнен откат к предыдущей версии ({len(previous)} записей)"))
+        return True
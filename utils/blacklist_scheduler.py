@@ -0,0 +1,125 @@
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from utils.update_utils import BLACKLIST_FAILED, BLACKLIST_UPDATED, UpdateChecker, blacklists_update_running
+from utils.utils import settings, tr
+
+# Интервал обновления черных списков по умолчанию, в секундах
+DEFAULT_REFRESH_INTERVAL = 6 * 60 * 60
+# Первая повторная попытка после ошибки; далее интервал удваивается
+RETRY_INTERVAL = 5 * 60
+# Относительный разброс времени обновления, чтобы машины не обращались к источнику одновременно
+REFRESH_JITTER = 0.1
+# Период проверки расписания
+TICK_INTERVAL_MS = 60 * 1000
+
+
+class BlacklistRefreshThread(QThread):
+    """
+    Обновляет указанные черные списки в фоне.
+    """
+
+    def __init__(self, names: List[str], parent=None):
+        super().__init__(parent)
+        self.names = names
+        self.results: Dict[str, str] = {}
+        self.changes: Dict[str, Any] = {}
+
+    def run(self):
+        update_checker = UpdateChecker()
+        update_checker.update_blacklists(names=self.names)
+        self.results = update_checker.blacklist_results
+        self.changes = update_checker.blacklist_changes
+
+
+class BlacklistScheduler(QObject):
+    """
+    Планировщик фонового обновления черных списков.
+
+    Для каждого источника хранится время следующего обновления: интервал
+    берётся из поля "interval" описания источника или из настройки
+    "blacklists_refresh_interval", к нему добавляется случайный разброс.
+    После ошибки источник повторяется с экспоненциально растущей задержкой,
+    не превышающей обычный интервал.
+    """
+    # Пути к спискам, содержимое которых действительно изменилось
+    lists_changed_signal = pyqtSignal(list)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sources: Dict[str, Dict[str, str]] = {blacklist['name']: blacklist for blacklist in UpdateChecker.BLACKLISTS}
+        self.next_due: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
+        self.thread: Optional[BlacklistRefreshThread] = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.value("blacklists_auto_refresh", False, type=bool)
+
+    def interval(self, name: str) -> int:
+        """
+        Возвращает интервал обновления источника в секундах.
+        """
+        default = settings.value("blacklists_refresh_interval", DEFAULT_REFRESH_INTERVAL, type=int)
+        return max(RETRY_INTERVAL, int(self.sources[name].get('interval') or default))
+
+    def schedule(self, name: str) -> None:
+        """
+        Назначает время следующего обновления источника с учётом ошибок.
+        """
+        interval = self.interval(name)
+        failures = self.failures.get(name, 0)
+        delay = min(interval, RETRY_INTERVAL * 2 ** (failures - 1)) if failures else interval
+        delay *= random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+        self.next_due[name] = time.monotonic() + delay
+        self.logger.debug(f"{name}: следующее обновление через {delay / 60:.0f} мин")
+
+    def start(self) -> None:
+        for name in self.sources:
+            self.schedule(name)
+        self.timer.start(TICK_INTERVAL_MS)
+
+    def stop(self) -> None:
+        self.timer.stop()
+        if self.thread is not None and self.thread.isRunning():
+            self.thread.wait()
+
+    def tick(self) -> None:
+        """
+        Запускает обновление всех источников, время которых наступило.
+        """
+        if not self.is_enabled() or (self.thread is not None and self.thread.isRunning()):
+            return
+        if blacklists_update_running():
+            # Идёт ручное обновление: наступившие источники будут обновлены на следующем такте
+            return
+        now = time.monotonic()
+        due = [name for name, moment in self.next_due.items() if moment <= now]
+        if not due:
+            return
+        self.logger.info(tr(f"Плановое обновление черных списков: {', '.join(due)}"))
+        self.thread = BlacklistRefreshThread(due, self)
+        self.thread.finished.connect(self.on_refresh_finished)
+        self.thread.start()
+
+    def on_refresh_finished(self) -> None:
+        changed = []
+        for name in self.thread.names:
+            status = self.thread.results.get(name, BLACKLIST_FAILED)
+            if status == BLACKLIST_FAILED:
+                self.failures[name] = self.failures.get(name, 0) + 1
+                self.logger.warning(tr(f"{name}: ошибка планового обновления, попытка {self.failures[name]}"))
+            else:
+                self.failures.pop(name, None)
+                if status == BLACKLIST_UPDATED:
+                    changed.append(self.sources[name]['output_file'])
+            self.schedule(name)
+        if changed:
+            self.lists_changed_signal.emit(changed)
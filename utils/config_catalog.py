@@ -0,0 +1,197 @@
+import glob
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from utils.config_loader import ScriptOptions, load_script_options
+from utils.utils import BASE_FOLDER, settings, tr
+
+CONFIG_FOLDER = os.path.join(BASE_FOLDER, "config")
+CONFIG_PATTERN = "*.ini"
+
+# Дополнительные папки и отдельные файлы конфигураций, добавленные пользователем
+CONFIG_FOLDERS_SETTING = "config_folders"
+CONFIG_FILES_SETTING = "config_files"
+
+# Редакторы сохраняют файл в несколько приёмов, поэтому изменения собираются с задержкой
+RESCAN_DELAY_MS = 300
+
+
+def catalog_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass
+class ConfigEntry:
+    """
+    Проиндексированный файл конфигурации.
+    """
+    path: str
+    signature: Optional[Tuple[int, int]] = None
+    script_options: Optional[ScriptOptions] = None
+    error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    @property
+    def is_valid(self) -> bool:
+        return self.error is None and self.script_options is not None
+
+    @property
+    def profiles(self) -> List[str]:
+        return list(self.script_options) if self.script_options else []
+
+
+class ConfigCatalog(QObject):
+    """
+    Каталог конфигураций из папки config/ и добавленных пользователем папок и файлов.
+
+    Для каждого файла хранятся профили, ошибка загрузки и отпечаток (время
+    изменения и размер). QFileSystemWatcher сообщает об изменениях, и
+    перечитываются только файлы с изменившимся отпечатком.
+    """
+    # Пути к файлам, которые были добавлены, изменены или удалены
+    catalog_changed_signal = pyqtSignal(list)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.entries: Dict[str, ConfigEntry] = {}
+        self.folders: List[str] = [CONFIG_FOLDER]
+        for folder in settings.value(CONFIG_FOLDERS_SETTING, [], type=list):
+            if catalog_key(folder) not in map(catalog_key, self.folders):
+                self.folders.append(folder)
+        self.files: List[str] = [path for path in settings.value(CONFIG_FILES_SETTING, [], type=list) if path]
+        # Файлы вне каталога, открытые через load(); отслеживаются до выхода, но не запоминаются
+        self.opened: List[str] = []
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_path_changed)
+        self.watcher.fileChanged.connect(self.on_path_changed)
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY_MS)
+        self.rescan_timer.timeout.connect(self.rescan)
+
+    def scan(self) -> None:
+        """
+        Индексирует все конфигурации и начинает отслеживать их изменения.
+        """
+        self.rescan()
+        self.logger.info(tr("В каталоге конфигураций {count} файлов").format(count=len(self.entries)))
+
+    def discover(self) -> List[str]:
+        """
+        Возвращает пути ко всем файлам конфигураций в отслеживаемых папках, отдельные
+        и открытые файлы.
+        """
+        paths = []
+        for folder in self.folders:
+            paths.extend(sorted(glob.glob(os.path.join(folder, CONFIG_PATTERN))))
+        paths.extend(path for path in self.files + self.opened if os.path.isfile(path))
+        unique = {}
+        for path in paths:
+            unique.setdefault(catalog_key(path), path)
+        return list(unique.values())
+
+    def refresh(self, path: str) -> bool:
+        """
+        Перечитывает файл, если изменился его отпечаток.
+
+        :return: True, если запись в каталоге изменилась.
+        """
+        key = catalog_key(path)
+        signature = file_signature(path)
+        entry = self.entries.get(key)
+        if entry is not None and entry.signature == signature:
+            return False
+        script_options, error = load_script_options(path)
+        self.entries[key] = ConfigEntry(path, signature, script_options, error)
+        if error:
+            self.logger.warning(f"{path}: {error}")
+        return True
+
+    def rescan(self) -> None:
+        """
+        Обновляет каталог: добавляет новые файлы, удаляет исчезнувшие и
+        перечитывает изменённые.
+        """
+        discovered = self.discover()
+        keys: Set[str] = {catalog_key(path) for path in discovered}
+        changed = [entry.path for key, entry in self.entries.items() if key not in keys]
+        for path in changed:
+            del self.entries[catalog_key(path)]
+        changed.extend(path for path in discovered if self.refresh(path))
+        self.watch(discovered)
+        if changed:
+            self.logger.debug(f"Изменены конфигурации: {changed}")
+            self.catalog_changed_signal.emit(changed)
+
+    def watch(self, paths: List[str]) -> None:
+        # Файл, заменённый при сохранении, пропадает из наблюдения, поэтому список обновляется при каждом проходе
+        wanted = [folder for folder in self.folders if os.path.isdir(folder)] + paths
+        watched = set(self.watcher.directories() + self.watcher.files())
+        missing = [path for path in wanted if path not in watched]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def on_path_changed(self, path: str) -> None:
+        self.rescan_timer.start()
+
+    def entry(self, path: str) -> Optional[ConfigEntry]:
+        return self.entries.get(catalog_key(path))
+
+    def valid_entries(self) -> List[ConfigEntry]:
+        return [entry for entry in self.entries.values() if entry.is_valid]
+
+    def load(self, path: str) -> Tuple[Optional[ScriptOptions], Optional[str]]:
+        """
+        Возвращает профили файла из каталога; файл вне каталога индексируется без сохранения в настройках.
+
+        :return: Словарь профилей и сообщение об ошибке, если оно произошло.
+        """
+        if not self.contains(path) and catalog_key(path) not in map(catalog_key, self.opened):
+            self.opened.append(path)
+        self.refresh(path)
+        entry = self.entry(path)
+        return entry.script_options, entry.error
+
+    def contains(self, path: str) -> bool:
+        """
+        Проверяет, что файл лежит в отслеживаемой папке или добавлен пользователем.
+        """
+        folder = catalog_key(os.path.dirname(path))
+        return folder in map(catalog_key, self.folders) or catalog_key(path) in map(catalog_key, self.files)
+
+    def add_file(self, path: str) -> None:
+        """
+        Добавляет файл конфигурации вне отслеживаемых папок в каталог и запоминает его.
+        """
+        if self.contains(path):
+            return
+        self.files.append(path)
+        settings.setValue(CONFIG_FILES_SETTING, self.files)
+        self.rescan()
+
+    def add_folder(self, folder: str) -> None:
+        """
+        Добавляет папку с конфигурациями в каталог и запоминает её.
+        """
+        if catalog_key(folder) in map(catalog_key, self.folders):
+            return
+        self.folders.append(folder)
+        settings.setValue(CONFIG_FOLDERS_SETTING, self.folders[1:])
+        self.rescan()
@@ -0,0 +1,190 @@
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.template_engine import TemplateError, builtin_variables, define_variables, render
+from utils.utils import BASE_FOLDER, tr
+from utils.winws_args import WinwsArgsError, canonical_args
+
+logger = logging.getLogger("ConfigLoader")
+
+# Профили конфигурации: {имя секции: (исполняемый файл, аргументы)}
+ScriptOptions = Dict[str, Tuple[str, List[str]]]
+
+OPTIONS_SECTION = "SCRIPT_OPTIONS"
+REQUIRED_KEYS = ("executable", "args")
+WINWS_EXECUTABLE = "winws.exe"
+
+SECTION_RE = re.compile(r"^\[(?P<name>.+)\]\s*$")
+OPTION_RE = re.compile(r"^(?P<key>[^=:\s][^=:]*?)\s*[=:]\s*(?P<value>.*)$")
+COMMENT_PREFIXES = ("#", ";")
+
+
+class ConfigLoadError(Exception):
+    """
+    Файл конфигурации не может быть загружен.
+    """
+
+
+def parse_sections(lines: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Разбирает INI за один проход, в том же формате, что configparser:
+    комментарии с "#" и ";", многострочные значения с отступом, ключи без учёта регистра.
+
+    :raises ConfigLoadError: При повторяющихся секциях или ключах и синтаксических ошибках.
+    """
+    sections: Dict[str, Dict[str, str]] = {}
+    duplicates: List[str] = []
+    current: Optional[Dict[str, str]] = None
+    section_name = ""
+    key: Optional[str] = None
+    value_lines: List[str] = []
+
+    def flush() -> None:
+        if current is not None and key is not None:
+            current[key] = "\n".join(value_lines).strip()
+
+    for number, raw in enumerate(lines, 1):
+        line = raw.rstrip("\r\n")
+        stripped = line.strip()
+        if not stripped or stripped.startswith(COMMENT_PREFIXES):
+            continue
+        if line[0].isspace() and key is not None:
+            value_lines.append(stripped)
+            continue
+
+        flush()
+        key = None
+        section = SECTION_RE.match(stripped)
+        if section:
+            section_name = section.group("name").strip()
+            if section_name in sections:
+                if section_name not in duplicates:
+                    duplicates.append(section_name)
+                current = sections[section_name]
+            else:
+                current = sections[section_name] = {}
+            continue
+
+        option = OPTION_RE.match(stripped)
+        if current is None or not option:
+            raise ConfigLoadError(tr("Ошибка при чтении config.ini: {error}").format(
+                error=f"line {number}: {stripped}"
+            ))
+        key = option.group("key").strip().lower()
+        if key in current and section_name not in duplicates:
+            raise ConfigLoadError(tr("Ошибка при чтении config.ini: {error}").format(
+                error=f"[{section_name}] {key}"
+            ))
+        value_lines = [option.group("value")]
+    flush()
+
+    if duplicates:
+        raise ConfigLoadError(tr("Ошибка: Названия разделов конфигурации не должны повторяться: {duplicates}").format(
+            duplicates=", ".join(duplicates)
+        ))
+    return sections
+
+
+def compile_profiles(sections: Dict[str, Dict[str, str]]) -> ScriptOptions:
+    """
+    Проверяет обязательные секции и ключи и собирает профили запуска.
+
+    Ключи секции [SCRIPT_OPTIONS] становятся переменными для всех профилей,
+    дополнительные ключи профиля — переменными только этого профиля:
+
+    [SCRIPT_OPTIONS]
+    lists = {BLACKLIST_FOLDER}
+
+    [Профиль]
+    hostlist = {LISTS}\\universal.txt
+    executable = {ZAPRET_FOLDER}\\winws.exe
+    args = --hostlist={HOSTLIST}; --wf-l3={ENV:WINWS_L3}
+
+    :raises ConfigLoadError: Если конфигурация неполная или содержит неизвестные переменные.
+    """
+    if OPTIONS_SECTION not in sections:
+        raise ConfigLoadError(tr("Ошибка: Отсутствует секция [SCRIPT_OPTIONS] в конфигурационном файле"))
+    profiles = [name for name in sections if name != OPTIONS_SECTION]
+    if not profiles:
+        raise ConfigLoadError(tr("Ошибка: В секции [SCRIPT_OPTIONS] отсутствуют настройки скриптов"))
+
+    try:
+        variables = define_variables(builtin_variables(), sections[OPTIONS_SECTION].items())
+    except TemplateError as e:
+        raise ConfigLoadError(f"{tr('Ошибка')}: [{OPTIONS_SECTION}] {e}")
+
+    script_options: ScriptOptions = {}
+    for name in profiles:
+        values = sections[name]
+        for key in REQUIRED_KEYS:
+            if key not in values:
+                raise ConfigLoadError(f"{tr('Ошибка')}: {tr('В секции')} [{name}] {tr('отсутствует ключ')} '{key}'")
+
+        try:
+            profile_variables = define_variables(
+                variables.child(),
+                ((key, value) for key, value in values.items() if key not in REQUIRED_KEYS)
+            )
+            args = " ".join(values["args"].splitlines())
+            args_list = [render(arg.strip(), profile_variables) for arg in args.split(";") if arg.strip()]
+            executable = render(values["executable"], profile_variables)
+        except TemplateError as e:
+            raise ConfigLoadError(f"{tr('Ошибка')}: [{name}] {e}")
+
+        if not os.path.isabs(executable):
+            executable = os.path.join(BASE_FOLDER, executable)
+        if os.path.basename(executable.replace("\\", "/")).lower() == WINWS_EXECUTABLE:
+            try:
+                args_list, stats = canonical_args(args_list)
+            except WinwsArgsError as e:
+                raise ConfigLoadError(f"{tr('Ошибка')}: [{name}] {e}")
+            if stats.changed:
+                logger.info(tr("Профили [{name}] упрощены: {stats}").format(name=name, stats=stats))
+        script_options[name] = (executable, args_list)
+    return script_options
+
+
+_cache: Dict[str, Tuple[Tuple[int, int], Optional[ScriptOptions], Optional[str]]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_script_options(config_path: str) -> Tuple[Optional[ScriptOptions], Optional[str]]:
+    """
+    Загружает профили из конфигурационного файла за один проход.
+    Результат кешируется по пути, времени изменения и размеру файла, поэтому
+    повторная загрузка неизменённого файла не читает его заново.
+
+    :return: Словарь профилей и сообщение об ошибке, если оно произошло.
+    """
+    path = os.path.normcase(os.path.abspath(config_path))
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, f"{tr('Файл не найден')}: {config_path}"
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        logger.debug(f"Конфигурация {config_path} взята из кеша")
+        return cached[1], cached[2]
+
+    script_options: Optional[ScriptOptions] = None
+    error: Optional[str] = None
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            script_options = compile_profiles(parse_sections(f))
+        logger.info(tr("SCRIPT_OPTIONS загружены: {options}").format(options=script_options))
+    except ConfigLoadError as e:
+        error = str(e)
+    except PermissionError:
+        error = f"{tr('Недостаточно прав для чтения файла')}: {config_path}"
+    except (OSError, UnicodeDecodeError) as e:
+        error = tr("Ошибка при обработке config.ini: {error}").format(error=e)
+
+    with _cache_lock:
+        _cache[path] = (signature, script_options, error)
+    return script_options, error
@@ -0,0 +1,421 @@
+import argparse
+import codecs
+import glob
+import logging
+import ntpath
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.utils import tr
+from utils.winws_args import NEW_PROFILE, WinwsArgsError, parse_winws_args
+
+logger = logging.getLogger("ConverterUtils")
+
+# Способы обхода и списки хостов, которые подставляются вместо --hostlist из bat-файла
+METHOD_UNIVERSAL = "universal"
+METHOD_DISCORD_YOUTUBE = "discord_youtube"
+METHOD_RKN = "rkn"
+HOSTLIST_VARIABLES = {
+    METHOD_UNIVERSAL: "{BLACKLIST_FILES_2}",
+    METHOD_DISCORD_YOUTUBE: "{BLACKLIST_FILES_1}",
+    METHOD_RKN: "{BLACKLIST_FILES_0}",
+}
+
+WINWS_EXECUTABLE = "winws.exe"
+SCRIPT_DIR = "%~dp0"
+BATCH_PATTERN = "*.bat"
+
+# %NAME%, %~dp0 и %%; прочие модификаторы (%~n0 и т.п.) не раскрываются
+BATCH_VARIABLE_RE = re.compile(r"%~dp0|%%|%(?P<name>[A-Za-z_][A-Za-z0-9_]*)%")
+SECTION_NAME_RE = re.compile(r"[\[\]\r\n]")
+# Операторы cmd, завершающие команду, и перенаправления ввода-вывода
+COMMAND_SEPARATORS = "&|"
+REDIRECTIONS = "<>"
+# getopt в winws принимает значение этих параметров только через "=", а не отдельным аргументом
+NO_SEPARATE_VALUE_OPTIONS = {
+    "--debug", "--dry-run", "--version", "--ipcache-hostname", "--ctrack-disable",
+    "--dpi-desync-any-protocol", "--dpi-desync-autottl", "--dpi-desync-autottl6",
+    "--dpi-desync-skip-nosni", "--skip", NEW_PROFILE,
+}
+COMMENT_RE = re.compile(r"^\s*(::|rem(\s|$))", re.IGNORECASE)
+CHCP_RE = re.compile(rb"^\s*@?chcp(?:\.com)?\s+(\d+)", re.IGNORECASE | re.MULTILINE)
+RUSSIAN_LETTER_RE = re.compile("[А-Яа-яЁё]")
+
+# Кодовые страницы, которые встречаются в chcp у bat-файлов стратегий
+CODEPAGES = {b"65001": "utf-8", b"866": "cp866", b"1251": "cp1251"}
+# Кодировки консоли и редакторов Windows для файлов без chcp и не в UTF-8
+LEGACY_ENCODINGS = ("cp866", "cp1251")
+
+
+@dataclass
+class ConversionResult:
+    """
+    Результат конвертации одного bat-файла или команды.
+    """
+    source: str
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def profiles(self) -> int:
+        return sum(args.count(NEW_PROFILE) + 1 for args in self.sections.values())
+
+
+def logical_lines(lines: Iterable[str]) -> Iterable[str]:
+    """
+    Склеивает строки, продолженные символом ^ в конце, как это делает cmd.
+    ^, за которым идут пробелы, экранирует пробел и строку не продолжает.
+    """
+    pending = ""
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        continued = False
+        if line.endswith("^"):
+            # ^^ в конце — экранированный символ, а не продолжение
+            carets = len(line) - len(line.rstrip("^"))
+            continued = carets % 2 == 1 and line.count('"') % 2 == 0
+        if continued:
+            pending += line[:-1]
+            continue
+        yield pending + line
+        pending = ""
+    if pending:
+        yield pending
+
+
+def split_commands(line: str) -> List[List[str]]:
+    """
+    Делит строку на команды и их аргументы по правилам cmd: пробелы вне кавычек
+    разделяют аргументы, кавычки снимаются, ^ экранирует следующий символ,
+    &, &&, | и || разделяют команды. Перенаправления (> nul, 2>&1, < file)
+    вместе с их целью в аргументы не попадают.
+    """
+    commands: List[List[str]] = [[]]
+    current: List[str] = []
+    in_token = in_quotes = escaped = redirect = False
+
+    def finish_token() -> None:
+        nonlocal current, in_token, redirect
+        if in_token:
+            if redirect:
+                redirect = False
+            else:
+                commands[-1].append("".join(current))
+        current = []
+        in_token = False
+
+    position = 0
+    while position < len(line):
+        char = line[position]
+        following = line[position + 1:position + 2]
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '"':
+            in_quotes = not in_quotes
+            in_token = True
+        elif in_quotes:
+            current.append(char)
+        elif char == "^":
+            escaped = in_token = True
+        elif char in " \t":
+            finish_token()
+        elif char in COMMAND_SEPARATORS:
+            finish_token()
+            if following == char:
+                position += 1
+            commands.append([])
+        elif char in REDIRECTIONS:
+            if len(current) == 1 and current[0].isdigit():
+                # Номер потока перед > (2>nul) относится к перенаправлению
+                current, in_token = [], False
+            finish_token()
+            if following == ">":
+                position += 1
+            if line[position + 1:position + 2] == "&":
+                # >&1 — перенаправление в другой поток
+                position += 1
+            redirect = True
+        else:
+            current.append(char)
+            in_token = True
+        position += 1
+    finish_token()
+    return [command for command in commands if command]
+
+
+def expand_batch_variables(line: str, variables: Dict[str, str], unresolved: List[str]) -> str:
+    """
+    Раскрывает %NAME%, заданные через set; %~dp0 и неизвестные переменные остаются как есть.
+    """
+    def replace(match: re.Match) -> str:
+        name = match.group("name")
+        if name is None:
+            return "%" if match.group(0) == "%%" else SCRIPT_DIR
+        value = variables.get(name.upper())
+        if value is None:
+            if match.group(0) not in unresolved:
+                unresolved.append(match.group(0))
+            return match.group(0)
+        return value
+    return BATCH_VARIABLE_RE.sub(replace, line)
+
+
+def convert_path(value: str) -> str:
+    """
+    Заменяет путь относительно bat-файла на путь в папках программы:
+    списки (.txt) — в {BLACKLIST_FOLDER}, остальные файлы — в {ZAPRET_FOLDER}.
+    """
+    if SCRIPT_DIR not in value:
+        return value
+    name = ntpath.basename(value.split(SCRIPT_DIR)[-1])
+    folder = "{BLACKLIST_FOLDER}" if name.lower().endswith(".txt") else "{ZAPRET_FOLDER}"
+    return f"{folder}\\{name}"
+
+
+def convert_winws_args(tokens: List[str], hostlist_variable: str, warnings: List[str]) -> List[str]:
+    """
+    Приводит аргументы winws из bat-файла к формату config.ini.
+    Значения, заданные отдельным аргументом ("--opt value"), присоединяются через "=";
+    аргументы, которые winws не принял бы как значение, пропускаются с предупреждением.
+    """
+    args: List[str] = []
+    for token in tokens:
+        if not token.startswith("--"):
+            if args and "=" not in args[-1] and args[-1] not in NO_SEPARATE_VALUE_OPTIONS:
+                args[-1] = f"{args[-1]}={token}"
+            else:
+                warnings.append(tr("Пропущен лишний аргумент \"{value}\"").format(value=token))
+            continue
+        args.append(token)
+
+    converted = []
+    for arg in args:
+        name, separator, value = arg.partition("=")
+        if name == "--hostlist":
+            arg = f"{name}={hostlist_variable}"
+        elif separator:
+            arg = f"{name}={','.join(convert_path(item) for item in value.split(','))}"
+        converted.append(arg)
+    return converted
+
+
+def convert_batch(lines: Iterable[str], source: str, method: str = METHOD_UNIVERSAL) -> ConversionResult:
+    """
+    Конвертирует bat-файл за один проход: учитывает set, продолжения строк ^
+    и кавычки, находит запуски winws.exe и собирает для каждого секцию.
+
+    :param lines: Строки bat-файла или вставленной команды.
+    :param source: Имя секции, обычно имя файла без расширения.
+    :param method: Способ обхода, определяющий подставляемый список хостов.
+    :return: Секции и предупреждения.
+    """
+    result = ConversionResult(source)
+    hostlist_variable = HOSTLIST_VARIABLES.get(method, HOSTLIST_VARIABLES[METHOD_UNIVERSAL])
+    variables: Dict[str, str] = {}
+    unresolved: List[str] = []
+    loose_args: List[str] = []
+    commands: List[List[str]] = []
+
+    for line in logical_lines(lines):
+        if not line.strip() or COMMENT_RE.match(line):
+            continue
+        for tokens in split_commands(expand_batch_variables(line, variables, unresolved)):
+            command = tokens[0].lstrip("@").lower()
+            if command == "set" and len(tokens) > 1:
+                assignment = tokens[1] if not tokens[1].startswith("/") else ""
+                name, separator, value = assignment.partition("=")
+                if separator:
+                    variables[name.strip().upper()] = value
+                continue
+            executable = next(
+                (index for index, token in enumerate(tokens)
+                 if ntpath.basename(token).lower() == WINWS_EXECUTABLE), None
+            )
+            if executable is not None:
+                commands.append(tokens[executable + 1:])
+            elif tokens[0].startswith("--"):
+                # Вставлены только аргументы, без запуска winws.exe
+                loose_args.extend(tokens)
+
+    if not commands and loose_args:
+        commands.append(loose_args)
+    if not commands:
+        result.warnings.append(tr("Не найден запуск winws.exe"))
+    for variable in unresolved:
+        result.warnings.append(tr("Неизвестная переменная {name}").format(name=variable))
+
+    for number, tokens in enumerate(commands, 1):
+        args = convert_winws_args(tokens, hostlist_variable, result.warnings)
+        try:
+            result.warnings.extend(parse_winws_args(args).warnings)
+        except WinwsArgsError as e:
+            result.warnings.append(str(e))
+        name = source if number == 1 else f"{source} ({number})"
+        result.sections[name] = args
+    return result
+
+
+def format_section(name: str, args: List[str]) -> str:
+    lines = [f"[{name}]", "executable = {ZAPRET_FOLDER}\\winws.exe", "args ="]
+    lines.extend(f"    {arg};" for arg in args)
+    return "\n".join(lines) + "\n"
+
+
+def format_config(sections: Dict[str, List[str]], add_script_options: bool = True) -> str:
+    """
+    Собирает текст config.ini из секций.
+    """
+    parts = ["[SCRIPT_OPTIONS]\n"] if add_script_options else []
+    parts.extend(format_section(name, args) for name, args in sections.items())
+    return "\n".join(parts)
+
+
+def section_name(path: str) -> str:
+    return SECTION_NAME_RE.sub("_", os.path.splitext(os.path.basename(path))[0]).strip() or "config"
+
+
+def unique_section_name(name: str, used: Dict[str, List[str]]) -> str:
+    candidate, number = name, 1
+    while candidate in used or candidate == "SCRIPT_OPTIONS":
+        number += 1
+        candidate = f"{name} ({number})"
+    return candidate
+
+
+def find_batch_files(patterns: Iterable[str]) -> List[str]:
+    """
+    Раскрывает папки и маски в список bat-файлов.
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, BATCH_PATTERN))
+        else:
+            matches = glob.glob(pattern) or ([pattern] if os.path.isfile(pattern) else [])
+        paths.extend(sorted(path for path in matches if path not in paths))
+    return paths
+
+
+def detect_encoding(data: bytes) -> str:
+    """
+    Определяет кодировку bat-файла: BOM UTF-8, кодовая страница из chcp,
+    корректный UTF-8, иначе cp866 или cp1251 — та, в которой получается
+    больше русских букв (в другой часть байтов станет псевдографикой).
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    match = CHCP_RE.search(data)
+    if match and match.group(1) in CODEPAGES:
+        encoding = CODEPAGES[match.group(1)]
+        try:
+            data.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            logger.debug(f"Файл не соответствует chcp {match.group(1).decode()}")
+    try:
+        data.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    return max(
+        LEGACY_ENCODINGS,
+        key=lambda encoding: len(RUSSIAN_LETTER_RE.findall(data.decode(encoding, errors="replace"))),
+    )
+
+
+def read_batch(path: str, encoding: Optional[str] = None) -> List[str]:
+    """
+    :param encoding: Кодировка файла; по умолчанию определяется по содержимому.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    return data.decode(encoding or detect_encoding(data), errors="replace").splitlines()
+
+
+def convert_batch_files(paths: Iterable[str], method: str = METHOD_UNIVERSAL,
+                        encoding: Optional[str] = None) -> Tuple[Dict[str, List[str]], List[ConversionResult]]:
+    """
+    Конвертирует bat-файлы в секции одного config.ini.
+
+    :param encoding: Кодировка bat-файлов; по умолчанию определяется для каждого файла.
+
+    :return: Секции по порядку файлов и результаты конвертации каждого файла.
+    """
+    sections: Dict[str, List[str]] = {}
+    results: List[ConversionResult] = []
+    for path in paths:
+        try:
+            lines = read_batch(path, encoding)
+        except OSError as e:
+            result = ConversionResult(path)
+            result.warnings.append(str(e))
+            results.append(result)
+            continue
+        result = convert_batch(lines, section_name(path), method)
+        result.source = path
+        for name, args in result.sections.items():
+            sections[unique_section_name(name, sections)] = args
+        results.append(result)
+    return sections, results
+
+
+def format_report(results: List[ConversionResult], elapsed: float) -> str:
+    """
+    Отчёт о конвертации: число секций и профилей по файлам и предупреждения.
+    """
+    lines = []
+    for result in results:
+        status = tr("секций: {sections}, профилей: {profiles}").format(
+            sections=len(result.sections), profiles=result.profiles
+        ) if result.sections else tr("пропущен")
+        lines.append(f"{result.source}: {status}")
+        lines.extend(f"    ! {warning}" for warning in result.warnings)
+    converted = sum(1 for result in results if result.sections)
+    lines.append(tr("Сконвертировано файлов: {converted} из {total} за {elapsed:.3f} с").format(
+        converted=converted, total=len(results), elapsed=elapsed
+    ))
+    return "\n".join(lines)
+
+
+def encoding_name(value: str) -> str:
+    try:
+        return codecs.lookup(value).name
+    except LookupError:
+        raise argparse.ArgumentTypeError(f"неизвестная кодировка: {value}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.converter_utils",
+        description="Конвертирует bat-файлы стратегий winws в один config.ini",
+    )
+    parser.add_argument("inputs", nargs="+", help="bat-файлы, папки или маски")
+    parser.add_argument("-o", "--output", required=True, help="итоговый .ini")
+    parser.add_argument("-m", "--method", choices=sorted(HOSTLIST_VARIABLES), default=METHOD_UNIVERSAL,
+                        help="список хостов, подставляемый вместо --hostlist")
+    parser.add_argument("-r", "--report", help="файл для отчёта о конвертации")
+    parser.add_argument("-e", "--encoding", type=encoding_name,
+                        help="кодировка bat-файлов; по умолчанию определяется по chcp и содержимому")
+    options = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    paths = find_batch_files(options.inputs)
+    sections, results = convert_batch_files(paths, options.method, options.encoding)
+    if sections:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(format_config(sections))
+    report = format_report(results, time.perf_counter() - started)
+    print(report)
+    if options.report:
+        with open(options.report, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    return 0 if sections else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import bz2
+import logging
+import re
+import struct
+from typing import Tuple
+
+from utils.utils import tr
+
+logger = logging.getLogger("DeltaUtils")
+
+BSDIFF_MAGIC = b"BSDIFF40"
+BSDIFF_HEADER_SIZE = 32
+
+# Блок различий bsdiff почти целиком состоит из нулей; складываются только ненулевые участки
+NONZERO_RUN = re.compile(rb"[^\x00]+")
+
+
+class DeltaPatchError(ValueError):
+    """
+    Патч повреждён или не подходит к исходному файлу.
+    """
+
+
+def _offtin(data: bytes, offset: int) -> int:
+    """
+    Читает 64-битное целое в формате bsdiff: модуль в little-endian, знак в старшем бите.
+    """
+    (value,) = struct.unpack_from("<Q", data, offset)
+    if value & (1 << 63):
+        return -(value & ~(1 << 63))
+    return value
+
+
+def _read_header(patch: bytes) -> Tuple[int, int, int]:
+    if len(patch) < BSDIFF_HEADER_SIZE or patch[:8] != BSDIFF_MAGIC:
+        raise DeltaPatchError(tr("Неизвестный формат патча"))
+    ctrl_length, diff_length, new_size = _offtin(patch, 8), _offtin(patch, 16), _offtin(patch, 24)
+    if ctrl_length < 0 or diff_length < 0 or new_size < 0:
+        raise DeltaPatchError(tr("Повреждён заголовок патча"))
+    return ctrl_length, diff_length, new_size
+
+
+def apply_bsdiff(old: bytes, patch: bytes) -> bytes:
+    """
+    Применяет патч в формате BSDIFF40 (bsdiff 4.x) к исходным данным.
+
+    :param old: Содержимое установленного файла.
+    :param patch: Содержимое патча.
+    :return: Содержимое новой версии.
+    :raises DeltaPatchError: Если патч повреждён или не соответствует исходному файлу.
+    """
+    ctrl_length, diff_length, new_size = _read_header(patch)
+    blocks_start = BSDIFF_HEADER_SIZE
+    try:
+        ctrl = bz2.decompress(patch[blocks_start:blocks_start + ctrl_length])
+        diff = bz2.decompress(patch[blocks_start + ctrl_length:blocks_start + ctrl_length + diff_length])
+        extra = bz2.decompress(patch[blocks_start + ctrl_length + diff_length:])
+    except (OSError, ValueError) as e:
+        raise DeltaPatchError(tr(f"Не удалось распаковать патч: {e}"))
+
+    new = bytearray(new_size)
+    old_pos = new_pos = diff_pos = extra_pos = ctrl_pos = 0
+    while new_pos < new_size:
+        if ctrl_pos + 24 > len(ctrl):
+            raise DeltaPatchError(tr("Патч обрывается раньше конца файла"))
+        add_length, copy_length, seek = _offtin(ctrl, ctrl_pos), _offtin(ctrl, ctrl_pos + 8), _offtin(ctrl, ctrl_pos + 16)
+        ctrl_pos += 24
+        if add_length < 0 or copy_length < 0 or new_pos + add_length + copy_length > new_size:
+            raise DeltaPatchError(tr("Повреждён управляющий блок патча"))
+
+        # Сложение блока различий с исходными данными по модулю 256
+        if diff_pos + add_length > len(diff):
+            raise DeltaPatchError(tr("Повреждён блок различий патча"))
+        chunk = bytearray(add_length)
+        base_start = max(old_pos, 0)
+        base_end = min(old_pos + add_length, len(old))
+        if base_start < base_end:
+            chunk[base_start - old_pos:base_end - old_pos] = old[base_start:base_end]
+        delta = diff[diff_pos:diff_pos + add_length]
+        for run in NONZERO_RUN.finditer(delta):
+            for position in range(run.start(), run.end()):
+                chunk[position] = (chunk[position] + delta[position]) & 0xFF
+        new[new_pos:new_pos + add_length] = chunk
+        diff_pos += add_length
+        new_pos += add_length
+        old_pos += add_length
+
+        if extra_pos + copy_length > len(extra):
+            raise DeltaPatchError(tr("Повреждён дополнительный блок патча"))
+        new[new_pos:new_pos + copy_length] = extra[extra_pos:extra_pos + copy_length]
+        extra_pos += copy_length
+        new_pos += copy_length
+        old_pos += seek
+    return bytes(new)
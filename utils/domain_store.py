@@ -0,0 +1,265 @@
+import bisect
+import logging
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional
+
+from utils.download_utils import atomic_replace, discard_temp, stream_to_temp
+from utils.utils import BLACKLIST_FILES, BLACKLIST_FOLDER, tr
+
+logger = logging.getLogger("DomainStore")
+
+# Компактное хранилище всех доменных списков из папки black
+DOMAIN_STORE_PATH = os.path.join(BLACKLIST_FOLDER, "hostlists.store")
+
+STORE_MAGIC = b"DPDS"
+STORE_VERSION = 1
+
+# Максимальная длина общего префикса, записываемая в один байт
+MAX_SHARED_PREFIX = 255
+
+
+def domain_to_key(domain: str) -> str:
+    """
+    Переводит домен в ключ с обратным порядком меток: "a.example.com" -> "com.example.a".
+    Такой порядок группирует домены одной зоны и делает префиксное сжатие эффективным.
+    """
+    return ".".join(reversed(domain.split(".")))
+
+
+def key_to_domain(key: str) -> str:
+    """
+    Обратное преобразование для domain_to_key.
+    """
+    return ".".join(reversed(key.split(".")))
+
+
+def read_domain_list(path: str) -> Iterator[str]:
+    """
+    Построчно читает список доменов, пропуская пустые строки и комментарии.
+    """
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            domain = line.strip()
+            if domain and not domain.startswith("#"):
+                yield domain
+
+
+class DomainStore:
+    """
+    Отсортированное, дедуплицированное хранилище доменов с битовыми масками
+    принадлежности к именованным спискам.
+
+    Формат файла: заголовок, имена списков и zlib-сжатый блок, в котором
+    ключи (домены с обратным порядком меток) записаны с префиксным сжатием
+    (front coding), а за ними следуют битовые маски каждого списка.
+    """
+
+    def __init__(self, keys: List[str], memberships: Dict[str, bytearray]):
+        self.keys = keys
+        self.memberships = memberships
+
+    @classmethod
+    def build(cls, sources: Dict[str, str]) -> "DomainStore":
+        """
+        Строит хранилище из текстовых списков.
+
+        :param sources: Словарь {имя списка: путь к .txt файлу}.
+        :return: Экземпляр DomainStore.
+        """
+        list_keys: Dict[str, set] = {}
+        for name, path in sources.items():
+            list_keys[name] = {
+                domain_to_key(domain) for domain in read_domain_list(path)
+                if len(domain.encode("utf-8")) <= MAX_SHARED_PREFIX
+            }
+
+        keys = sorted(set().union(*list_keys.values())) if list_keys else []
+        positions = {key: index for index, key in enumerate(keys)}
+        bitmap_size = (len(keys) + 7) // 8
+        memberships: Dict[str, bytearray] = {}
+        for name, members in list_keys.items():
+            bitmap = bytearray(bitmap_size)
+            for key in members:
+                index = positions[key]
+                bitmap[index >> 3] |= 1 << (index & 7)
+            memberships[name] = bitmap
+        return cls(keys, memberships)
+
+    @classmethod
+    def load(cls, path: str = DOMAIN_STORE_PATH) -> "DomainStore":
+        """
+        Загружает хранилище из файла.
+
+        :raises ValueError: Если файл повреждён или имеет неизвестный формат.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != STORE_MAGIC:
+            raise ValueError(tr("Неизвестный формат хранилища доменов: {path}").format(path=path))
+        version, list_count, key_count = struct.unpack_from("<BHI", data, 4)
+        if version != STORE_VERSION:
+            raise ValueError(tr("Неподдерживаемая версия хранилища доменов: {version}").format(version=version))
+        offset = 4 + struct.calcsize("<BHI")
+        names = []
+        for _ in range(list_count):
+            (length,) = struct.unpack_from("<H", data, offset)
+            offset += 2
+            names.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+
+        payload = zlib.decompress(data[offset:])
+        keys: List[str] = []
+        previous = b""
+        position = 0
+        for _ in range(key_count):
+            shared, suffix_length = payload[position], payload[position + 1]
+            position += 2
+            current = previous[:shared] + payload[position:position + suffix_length]
+            position += suffix_length
+            keys.append(current.decode("utf-8"))
+            previous = current
+
+        bitmap_size = (key_count + 7) // 8
+        memberships: Dict[str, bytearray] = {}
+        for name in names:
+            memberships[name] = bytearray(payload[position:position + bitmap_size])
+            position += bitmap_size
+        return cls(keys, memberships)
+
+    def save(self, path: str = DOMAIN_STORE_PATH) -> int:
+        """
+        Атомарно сохраняет хранилище в файл.
+
+        :return: Размер файла в байтах.
+        """
+        payload = bytearray()
+        previous = b""
+        for key in self.keys:
+            current = key.encode("utf-8")
+            shared = 0
+            limit = min(len(previous), len(current), MAX_SHARED_PREFIX)
+            while shared < limit and previous[shared] == current[shared]:
+                shared += 1
+            suffix = current[shared:]
+            payload += bytes((shared, len(suffix)))
+            payload += suffix
+            previous = current
+        for name in self.memberships:
+            payload += self.memberships[name]
+
+        header = bytearray(STORE_MAGIC)
+        header += struct.pack("<BHI", STORE_VERSION, len(self.memberships), len(self.keys))
+        for name in self.memberships:
+            encoded = name.encode("utf-8")
+            header += struct.pack("<H", len(encoded)) + encoded
+
+        temp_path, _, size = stream_to_temp([bytes(header), zlib.compress(bytes(payload), 9)], path)
+        try:
+            atomic_replace(temp_path, path)
+        except BaseException:
+            discard_temp(temp_path)
+            raise
+        return size
+
+    def list_names(self) -> List[str]:
+        return list(self.memberships)
+
+    def _is_member(self, name: str, index: int) -> bool:
+        return bool(self.memberships[name][index >> 3] & (1 << (index & 7)))
+
+    def index_of(self, domain: str) -> Optional[int]:
+        """
+        Возвращает позицию домена в хранилище или None.
+        """
+        key = domain_to_key(domain.strip().lower())
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def lists_for(self, domain: str) -> List[str]:
+        """
+        Возвращает имена списков, в которых домен записан явно.
+        """
+        index = self.index_of(domain)
+        if index is None:
+            return []
+        return [name for name in self.memberships if self._is_member(name, index)]
+
+    def domains(self, name: str) -> Iterator[str]:
+        """
+        Перебирает домены указанного списка.
+        """
+        bitmap = self.memberships[name]
+        for index, key in enumerate(self.keys):
+            if bitmap[index >> 3] & (1 << (index & 7)):
+                yield key_to_domain(key)
+
+    def materialize(self, name: str, output_path: str) -> int:
+        """
+        Атомарно записывает список в текстовом формате, который понимает winws.
+
+        :return: Количество записанных доменов.
+        """
+        domains = sorted(self.domains(name))
+        temp_path, _, _ = stream_to_temp(
+            [("\n".join(domains) + "\n").encode("utf-8")] if domains else [], output_path
+        )
+        try:
+            atomic_replace(temp_path, output_path)
+        except BaseException:
+            discard_temp(temp_path)
+            raise
+        return len(domains)
+
+
+def hostlist_sources() -> Dict[str, str]:
+    """
+    Возвращает доменные списки из BLACKLIST_FILES в виде {имя файла: путь}.
+    """
+    return {os.path.basename(path): path for path in BLACKLIST_FILES if os.path.exists(path)}
+
+
+def rebuild_domain_store(path: str = DOMAIN_STORE_PATH) -> Optional[DomainStore]:
+    """
+    Пересобирает хранилище из текущих списков в папке black.
+    """
+    sources = hostlist_sources()
+    if not sources:
+        logger.warning(tr("Нет доменных списков для построения хранилища"))
+        return None
+    try:
+        store = DomainStore.build(sources)
+        size = store.save(path)
+    except (OSError, ValueError) as e:
+        logger.error(tr(f"Не удалось построить хранилище доменов: {e}"))
+        return None
+    total = sum(os.path.getsize(source) for source in sources.values())
+    logger.info(tr(
+        f"Хранилище доменов обновлено: {len(store.keys)} уникальных доменов, "
+        f"{size} байт вместо {total} байт в {len(sources)} списках"
+    ))
+    return store
+
+
+def ensure_hostlists(paths: List[str], path: str = DOMAIN_STORE_PATH) -> None:
+    """
+    Восстанавливает отсутствующие доменные списки из хранилища перед запуском winws.
+
+    :param paths: Пути к спискам, которые должны существовать.
+    """
+    missing = [item for item in paths if not os.path.exists(item)]
+    if not missing or not os.path.exists(path):
+        return
+    try:
+        store = DomainStore.load(path)
+    except (OSError, ValueError, zlib.error) as e:
+        logger.error(tr(f"Не удалось загрузить хранилище доменов: {e}"))
+        return
+    for item in missing:
+        name = os.path.basename(item)
+        if name in store.memberships:
+            count = store.materialize(name, item)
+            logger.info(tr(f"Список {name} восстановлен из хранилища ({count} доменов)"))
@@ -0,0 +1,398 @@
+import hashlib
+import itertools
+import logging
+import lzma
+import os
+import tempfile
+import zlib
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from utils.http_client import finish_metrics
+from utils.utils import tr
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("DownloadUtils")
+
+# Размер блока при потоковой записи
+CHUNK_SIZE = 64 * 1024
+
+# Признаки HTML-страницы ошибки вместо списка
+HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<body")
+
+# Максимальная длина строки в списке доменов или адресов
+MAX_LINE_LENGTH = 1024
+
+# Предел размера распакованных данных (защита от «zip-бомб»)
+MAX_DECOMPRESSED_SIZE = 256 * 1024 * 1024
+
+# Сигнатуры и расширения поддерживаемых форматов сжатия
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+
+
+class DownloadValidationError(Exception):
+    """
+    Загруженный файл не прошёл проверку и не может заменить текущий.
+    """
+
+
+class DownloadCancelledError(Exception):
+    """
+    Загрузка отменена пользователем.
+    """
+
+
+# Обратный вызов прогресса: (получено байт, всего байт или None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def monitor_chunks(chunks: Iterable[bytes], total: Optional[int] = None,
+                   progress: Optional[ProgressCallback] = None, cancel_event=None,
+                   initial: int = 0, metrics=None) -> Iterator[bytes]:
+    """
+    Передаёт блоки данных дальше, сообщая о прогрессе и проверяя запрос отмены.
+
+    :param total: Ожидаемый общий размер или None.
+    :param progress: Обратный вызов прогресса.
+    :param cancel_event: threading.Event, установка которого прерывает загрузку.
+    :param initial: Уже полученный объём (при докачке).
+    :param metrics: Измерения запроса (response.metrics) для учёта объёма и длительности.
+    :raises DownloadCancelledError: Если установлен cancel_event.
+    """
+    done = initial
+    try:
+        for chunk in chunks:
+            if cancel_event is not None and cancel_event.is_set():
+                raise DownloadCancelledError(tr("загрузка отменена"))
+            done += len(chunk)
+            if metrics is not None:
+                metrics.bytes += len(chunk)
+            if progress is not None:
+                progress(done, total)
+            yield chunk
+    except BaseException as e:
+        if metrics is not None and not isinstance(e, GeneratorExit):
+            metrics.error = type(e).__name__
+        raise
+    finally:
+        finish_metrics(metrics)
+
+
+def content_length(response, offset: int = 0) -> Optional[int]:
+    """
+    Возвращает полный размер тела ответа с учётом уже полученной части.
+    """
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and not response.headers.get("Content-Encoding"):
+        return offset + int(length)
+    return None
+
+
+def detect_compression(url: str, head: bytes) -> Optional[str]:
+    """
+    Определяет формат сжатия по расширению в URL или по сигнатуре данных.
+
+    :return: "gzip", "xz", "zstd" или None для несжатых данных.
+    """
+    path = url.split("?", 1)[0].lower()
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _create_decompressor(compression: str):
+    if compression == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if compression == "xz":
+        return lzma.LZMADecompressor()
+    if compression == "zstd":
+        if zstandard is None:
+            raise DownloadValidationError(tr("для распаковки zstd требуется модуль zstandard"))
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise DownloadValidationError(tr("неизвестный формат сжатия: {compression}").format(compression=compression))
+
+
+def iter_decompressed(chunks: Iterable[bytes], compression: Optional[str] = "auto", url: str = "") -> Iterator[bytes]:
+    """
+    Потоково распаковывает данные gzip/xz/zstd. Несжатые данные передаются как есть.
+
+    :param chunks: Итератор блоков данных.
+    :param compression: Формат сжатия, "auto" для автоопределения или None.
+    :param url: Адрес источника (для определения формата по расширению).
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        if chunk:
+            head = chunk
+            break
+    if compression == "auto":
+        compression = detect_compression(url, head)
+    if not compression:
+        if head:
+            yield head
+        yield from chunks
+        return
+
+    decompressor = _create_decompressor(compression)
+    total = 0
+    for chunk in itertools.chain([head], chunks):
+        while chunk:
+            if getattr(decompressor, "eof", False):
+                # Следующая часть: gzip, xz (xz -T0, склеенные файлы) и zstd состоят из нескольких потоков
+                if compression == "xz":
+                    # Потоки xz могут разделяться нулевым выравниванием
+                    chunk = chunk.lstrip(b"\0")
+                    if not chunk:
+                        break
+                decompressor = _create_decompressor(compression)
+            data = decompressor.decompress(chunk)
+            total += len(data)
+            if total > MAX_DECOMPRESSED_SIZE:
+                raise DownloadValidationError(tr("распакованные данные превышают допустимый размер"))
+            if data:
+                yield data
+            chunk = getattr(decompressor, "unused_data", b"") if getattr(decompressor, "eof", False) else b""
+    if hasattr(decompressor, "flush"):
+        data = decompressor.flush()
+        if data:
+            yield data
+    if compression in ("gzip", "xz") and not decompressor.eof:
+        raise DownloadValidationError(tr("сжатые данные обрываются"))
+
+
+def stream_to_temp(chunks: Iterable[bytes], target_path: str) -> Tuple[str, str, int]:
+    """
+    Записывает поток данных во временный файл рядом с target_path.
+    Данные сбрасываются на диск (fsync) перед возвратом.
+
+    :param chunks: Итератор блоков данных (например, response.iter_content()).
+    :param target_path: Путь к файлу, который будет заменён.
+    :return: Путь к временному файлу, SHA-256 содержимого и его размер.
+    """
+    directory = os.path.dirname(target_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(target_path)}.", suffix=".tmp", dir=directory
+    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+
+def validate_list_file(path: str, min_lines: int = 1) -> Optional[str]:
+    """
+    Проверяет загруженный текстовый список: не пустой, не HTML-страница,
+    содержит достаточное число строк разумной длины.
+
+    :param path: Путь к проверяемому файлу.
+    :param min_lines: Минимальное число непустых строк.
+    :return: Описание ошибки или None, если файл корректен.
+    """
+    lines = 0
+    with open(path, "rb") as f:
+        head = f.read(1024).lstrip().lower()
+        if not head:
+            return tr("файл пуст")
+        if b"\x00" in head:
+            return tr("файл содержит двоичные данные")
+        if any(marker in head for marker in HTML_MARKERS):
+            return tr("получена HTML-страница вместо списка")
+        f.seek(0)
+        for line in f:
+            if len(line) > MAX_LINE_LENGTH:
+                return tr("слишком длинная строка в файле")
+            if line.strip():
+                lines += 1
+    if lines < min_lines:
+        return tr("слишком мало строк: {lines}").format(lines=lines)
+    return None
+
+
+def atomic_replace(temp_path: str, target_path: str) -> None:
+    """
+    Атомарно заменяет target_path временным файлом.
+    """
+    os.replace(temp_path, target_path)
+
+
+def discard_temp(temp_path: str) -> None:
+    """
+    Удаляет временный файл, игнорируя ошибки.
+    """
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
+
+
+def write_stream_atomically(chunks: Iterable[bytes], target_path: str, min_lines: int = 1) -> Tuple[str, int]:
+    """
+    Потоково записывает, проверяет и атомарно устанавливает текстовый список.
+
+    :param chunks: Итератор блоков данных.
+    :param target_path: Путь к итоговому файлу.
+    :param min_lines: Минимальное число непустых строк.
+    :raises DownloadValidationError: Если файл не прошёл проверку.
+    :return: SHA-256 содержимого и его размер.
+    """
+    temp_path, content_hash, size = stream_to_temp(chunks, target_path)
+    try:
+        error = validate_list_file(temp_path, min_lines=min_lines)
+        if error:
+            raise DownloadValidationError(error)
+        atomic_replace(temp_path, target_path)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+    logger.debug(f"{target_path}: записано {size} байт")
+    return content_hash, size
+
+
+# Число попыток докачки при обрыве соединения
+MAX_RESUME_ATTEMPTS = 3
+
+
+def file_sha256(path: str) -> str:
+    """
+    Вычисляет SHA-256 файла потоково.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fetch_into_partial(session, url: str, partial_path: str, timeout: Optional[float],
+                        progress: Optional[ProgressCallback] = None, cancel_event=None) -> None:
+    """
+    Дописывает недостающую часть файла через HTTP Range. Если сервер не поддерживает
+    Range или файл на сервере изменился (If-Range), загрузка начинается заново.
+    """
+    etag_path = partial_path + ".etag"
+    offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if os.path.exists(etag_path):
+            with open(etag_path, "r", encoding="utf-8") as f:
+                headers["If-Range"] = f.read().strip()
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 416 and offset:
+            # Частичный файл уже содержит всё тело ответа
+            return
+        if response.status_code == 206 and offset:
+            mode = "ab"
+            logger.info(tr(f"Докачка {url} с позиции {offset}"))
+        elif response.status_code == 200:
+            mode = "wb"
+        else:
+            raise DownloadValidationError(
+                tr("неожиданный код ответа: {code}").format(code=response.status_code)
+            )
+
+        etag = response.headers.get("ETag")
+        if mode == "wb" or not os.path.exists(etag_path):
+            if etag:
+                with open(etag_path, "w", encoding="utf-8") as f:
+                    f.write(etag)
+            elif os.path.exists(etag_path):
+                os.remove(etag_path)
+
+        initial = offset if mode == "ab" else 0
+        chunks = monitor_chunks(
+            response.iter_content(chunk_size=CHUNK_SIZE),
+            content_length(response, initial),
+            progress,
+            cancel_event,
+            initial,
+            getattr(response, "metrics", None),
+        )
+        with open(partial_path, mode) as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def download_resumable(session, url: str, target_path: str, expected_sha256: Optional[str] = None,
+                       timeout: Optional[float] = None, progress: Optional[ProgressCallback] = None,
+                       cancel_event=None) -> str:
+    """
+    Загружает файл в target_path + ".part" с докачкой после обрыва соединения,
+    проверяет SHA-256 и только после этого атомарно переносит его в target_path.
+
+    :param session: HTTP-сессия requests.
+    :param url: Адрес файла.
+    :param target_path: Итоговый путь к файлу.
+    :param expected_sha256: Ожидаемый SHA-256 или None, если проверка невозможна.
+    :param progress: Обратный вызов прогресса.
+    :param cancel_event: threading.Event для отмены; частичный файл сохраняется для докачки.
+    :raises DownloadValidationError: Если хеш не совпал или сервер вернул ошибку.
+    :raises DownloadCancelledError: Если загрузка отменена.
+    :return: Путь к проверенному файлу.
+    """
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    partial_path = target_path + ".part"
+    last_error: Optional[Exception] = None
+    for attempt in range(1, MAX_RESUME_ATTEMPTS + 1):
+        try:
+            _fetch_into_partial(session, url, partial_path, timeout, progress, cancel_event)
+            last_error = None
+            break
+        except OSError as e:
+            # Сетевые ошибки requests наследуются от IOError (OSError)
+            last_error = e
+            logger.warning(tr(f"Загрузка {url} прервана (попытка {attempt}): {e}"))
+    if last_error is not None:
+        raise last_error
+
+    if expected_sha256:
+        actual = file_sha256(partial_path)
+        if actual.lower() != expected_sha256.lower():
+            discard_temp(partial_path)
+            discard_temp(partial_path + ".etag")
+            raise DownloadValidationError(
+                tr("SHA-256 не совпадает: ожидался {expected}, получен {actual}").format(
+                    expected=expected_sha256, actual=actual
+                )
+            )
+        logger.info(tr(f"SHA-256 {os.path.basename(target_path)} подтверждён"))
+    else:
+        logger.warning(tr(f"Для {url} не опубликован SHA-256, проверка хеша пропущена"))
+
+    atomic_replace(partial_path, target_path)
+    discard_temp(partial_path + ".etag")
+    return target_path
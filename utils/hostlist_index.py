@@ -0,0 +1,130 @@
+import bisect
+import ipaddress
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.domain_store import domain_to_key, key_to_domain, read_domain_list
+from utils.ipset_utils import IpIntervalTable
+from utils.utils import BLACKLIST_FILES, BLACKLIST_FOLDER, tr
+
+logger = logging.getLogger("HostlistIndex")
+
+AUTOHOSTLIST_FILE = os.path.join(BLACKLIST_FOLDER, "autohostlist.txt")
+IPSET_FILES: List[str] = [
+    os.path.join(BLACKLIST_FOLDER, "ipset-discord.txt"),
+]
+
+
+def index_sources() -> Tuple[List[str], List[str]]:
+    """
+    Возвращает пути к доменным спискам и спискам адресов, которые попадают в индекс.
+    """
+    return BLACKLIST_FILES + [AUTOHOSTLIST_FILE], list(IPSET_FILES)
+
+
+class HostlistIndex:
+    """
+    Индекс для быстрых проверок «покрыт ли домен или адрес каким-либо списком».
+
+    Домены хранятся как отсортированные массивы ключей с обратным порядком
+    меток, поэтому проверка домена и всех его родительских доменов сводится
+    к нескольким бинарным поискам. Адреса хранятся в IpIntervalTable.
+    """
+
+    def __init__(self, domain_files: List[str], ipset_files: List[str]):
+        self.domain_lists: Dict[str, List[str]] = {}
+        self.ip_tables: Dict[str, IpIntervalTable] = {}
+        for path in domain_files:
+            if os.path.exists(path):
+                keys = {domain_to_key(domain.lower()) for domain in read_domain_list(path)}
+                self.domain_lists[os.path.basename(path)] = sorted(keys)
+        for path in ipset_files:
+            if os.path.exists(path):
+                self.ip_tables[os.path.basename(path)] = IpIntervalTable.from_file(path)
+
+    def lookup_domain(self, domain: str) -> List[Tuple[str, str]]:
+        """
+        Ищет домен и его родительские домены во всех доменных списках.
+
+        :return: Список пар (имя списка, найденная запись).
+        """
+        labels = domain.strip().strip(".").lower().split(".")
+        candidates = [".".join(reversed(labels[i:])) for i in range(len(labels))]
+        matches = []
+        for name, keys in self.domain_lists.items():
+            for key in candidates:
+                index = bisect.bisect_left(keys, key)
+                if index < len(keys) and keys[index] == key:
+                    matches.append((name, key_to_domain(key)))
+                    break
+        return matches
+
+    def lookup_ip(self, address: str) -> List[Tuple[str, str]]:
+        """
+        Ищет адрес во всех списках адресов.
+
+        :return: Список пар (имя списка, диапазон, содержащий адрес).
+        """
+        ip = ipaddress.ip_address(address)
+        matches = []
+        for name, table in self.ip_tables.items():
+            found = table.find(ip)
+            if found:
+                start, end = found
+                matches.append((name, f"{type(ip)(start)}-{type(ip)(end)}"))
+        return matches
+
+    def lookup(self, entry: str) -> List[Tuple[str, str]]:
+        """
+        Проверяет домен, адрес или подсеть (по первому адресу).
+        """
+        entry = entry.strip()
+        try:
+            return self.lookup_ip(entry.split("/")[0])
+        except ValueError:
+            return self.lookup_domain(entry)
+
+    def lookup_many(self, entries: Iterable[str]) -> Iterator[Tuple[str, List[Tuple[str, str]]]]:
+        """
+        Потоково проверяет набор записей, пропуская пустые строки и комментарии.
+        """
+        for line in entries:
+            entry = line.strip()
+            if entry and not entry.startswith("#"):
+                yield entry, self.lookup(entry)
+
+
+_index: Optional[HostlistIndex] = None
+_index_signature: Optional[tuple] = None
+_index_lock = threading.Lock()
+
+
+def _files_signature(paths: List[str]) -> tuple:
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def get_hostlist_index() -> HostlistIndex:
+    """
+    Возвращает кешированный индекс, перестраивая его при изменении
+    времени модификации или размера любого из исходных файлов.
+    """
+    global _index, _index_signature
+    domain_files, ipset_files = index_sources()
+    signature = _files_signature(domain_files + ipset_files)
+    with _index_lock:
+        if _index is None or signature != _index_signature:
+            started = time.perf_counter()
+            _index = HostlistIndex(domain_files, ipset_files)
+            _index_signature = signature
+            logger.info(tr(f"Индекс списков построен за {time.perf_counter() - started:.2f} с"))
+        return _index
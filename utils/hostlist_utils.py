@@ -0,0 +1,107 @@
+import logging
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from utils.domain_store import read_domain_list
+from utils.download_utils import atomic_replace, discard_temp, stream_to_temp
+
+try:
+    import idna
+except ImportError:
+    idna = None
+
+logger = logging.getLogger("HostlistUtils")
+
+
+@dataclass
+class MinimizeStats:
+    """
+    Статистика нормализации и минимизации списка доменов.
+    """
+    before: int = 0
+    after: int = 0
+    duplicates: int = 0
+    subdomains: int = 0
+    invalid: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.before} -> {self.after} "
+            f"(дубликаты: {self.duplicates}, поддомены: {self.subdomains}, некорректные: {self.invalid})"
+        )
+
+
+def normalize_domain(domain: str) -> Optional[str]:
+    """
+    Приводит домен к виду, в котором его сравнивает winws: нижний регистр,
+    без завершающей точки и маски "*.", IDN в punycode.
+
+    :return: Нормализованный домен или None, если строка не является доменом.
+    """
+    domain = domain.strip().lower().rstrip(".")
+    if domain.startswith("*."):
+        domain = domain[2:]
+    domain = domain.lstrip(".")
+    if not domain or " " in domain or "/" in domain:
+        return None
+    if not domain.isascii():
+        try:
+            if idna is not None:
+                domain = idna.encode(domain, uts46=True).decode("ascii")
+            else:
+                domain = domain.encode("idna").decode("ascii")
+        except (UnicodeError, ValueError):
+            return None
+    return domain
+
+
+def minimize_domains(domains: Iterable[str]) -> Tuple[List[str], MinimizeStats]:
+    """
+    Нормализует, дедуплицирует и сортирует домены, удаляя записи,
+    родительский домен которых уже есть в списке (winws покрывает поддомены).
+
+    :return: Минимальный отсортированный список и статистика.
+    """
+    stats = MinimizeStats()
+    unique = set()
+    for domain in domains:
+        stats.before += 1
+        normalized = normalize_domain(domain)
+        if normalized is None:
+            stats.invalid += 1
+        elif normalized in unique:
+            stats.duplicates += 1
+        else:
+            unique.add(normalized)
+
+    result = []
+    for domain in unique:
+        labels = domain.split(".")
+        if any(".".join(labels[i:]) in unique for i in range(1, len(labels))):
+            stats.subdomains += 1
+        else:
+            result.append(domain)
+    result.sort()
+    stats.after = len(result)
+    return result, stats
+
+
+def minimize_hostlist_file(path: str, output_path: Optional[str] = None) -> MinimizeStats:
+    """
+    Минимизирует список доменов в файле и атомарно записывает результат.
+
+    :param path: Исходный файл.
+    :param output_path: Файл для результата, по умолчанию исходный.
+    :return: Статистика до/после.
+    """
+    output_path = output_path or path
+    domains, stats = minimize_domains(read_domain_list(path))
+    data = ("\n".join(domains) + "\n").encode("utf-8") if domains else b""
+    temp_path, _, _ = stream_to_temp([data], output_path)
+    try:
+        atomic_replace(temp_path, output_path)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+    logger.debug(f"{output_path}: {stats}")
+    return stats
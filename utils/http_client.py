@@ -0,0 +1,366 @@
+import contextvars
+import email.utils
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from utils.utils import tr
+
+logger = logging.getLogger("HttpClient")
+
+# Размер пула keep-alive соединений на один хост; больше соединений к хосту не открывается
+DEFAULT_POOL_SIZE = 8
+
+# Таймауты по умолчанию для всех запросов: (установка соединения, ожидание данных), в секундах
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 30)
+# Таймаут быстрых проверок доступности (прокси и т.п.)
+PROBE_TIMEOUT: Tuple[float, float] = (5, 5)
+
+# Повтор при ошибках соединения и ответах 429/5xx с экспоненциальной задержкой 0.5, 1, 2 с
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions: Dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Измерения одного HTTP-запроса.
+    """
+    url: str
+    started: float = field(default_factory=time.perf_counter)
+    # DNS + TCP + TLS; 0 для переиспользованного keep-alive соединения
+    connect: float = 0.0
+    # Время до получения заголовков ответа
+    ttfb: float = 0.0
+    duration: float = 0.0
+    bytes: int = 0
+    retries: int = 0
+    status: int = 0
+    error: Optional[str] = None
+    finished: bool = False
+    # Запуск обновления, выполнивший запрос
+    run: Optional["MetricsRun"] = field(default=None, repr=False)
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc
+
+    @property
+    def throughput(self) -> float:
+        """
+        Скорость передачи тела ответа, байт/с.
+        """
+        transfer = self.duration - self.ttfb
+        return self.bytes / transfer if transfer > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.url}: {self.status or self.error}, connect {self.connect * 1000:.0f} мс, "
+            f"ttfb {self.ttfb * 1000:.0f} мс, {self.bytes} байт за {self.duration:.2f} с "
+            f"({format_speed(self.throughput)}), повторов {self.retries}"
+        )
+
+
+def format_speed(bytes_per_second: float) -> str:
+    if bytes_per_second >= 1024 * 1024:
+        return f"{bytes_per_second / (1024 * 1024):.1f} {tr('МБ/с')}"
+    return f"{bytes_per_second / 1024:.1f} {tr('КБ/с')}"
+
+
+class MetricsRun:
+    """
+    Измерения запросов одного запуска обновления. Запуск передаётся запросам
+    через contextvars, поэтому одновременные запуски не смешивают измерения.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.requests: List[RequestMetrics] = []
+        self.lock = threading.Lock()
+
+    def add(self, metrics: RequestMetrics) -> None:
+        with self.lock:
+            self.requests.append(metrics)
+
+    def summary(self) -> str:
+        """
+        Сводка по хостам: позволяет отличить медленное зеркало от медленной сети.
+        """
+        by_host: Dict[str, List[RequestMetrics]] = {}
+        for metrics in self.requests:
+            by_host.setdefault(metrics.host, []).append(metrics)
+        lines = [tr(f"{self.name}: {len(self.requests)} запросов за {time.perf_counter() - self.started:.2f} с")]
+        for host, items in by_host.items():
+            connected = [item.connect for item in items if item.connect]
+            transferred = sum(item.bytes for item in items)
+            transfer_time = sum(max(item.duration - item.ttfb, 0.0) for item in items)
+            lines.append(
+                f"  {host}: {len(items)} запр., ошибок {sum(1 for item in items if item.error or item.status >= 400)}, "
+                f"повторов {sum(item.retries for item in items)}, новых соединений {len(connected)}"
+                f" (в среднем {sum(connected) / len(connected) * 1000 if connected else 0:.0f} мс), "
+                f"ttfb в среднем {sum(item.ttfb for item in items) / len(items) * 1000:.0f} мс, "
+                f"{transferred} байт, {format_speed(transferred / transfer_time if transfer_time > 0 else 0.0)}"
+            )
+        return "\n".join(lines)
+
+
+# Текущий запуск обновления; в потоки пула передаётся через contextvars.copy_context()
+_current_run: contextvars.ContextVar[Optional[MetricsRun]] = contextvars.ContextVar("metrics_run", default=None)
+
+
+@contextmanager
+def record_metrics(name: str) -> Iterator[MetricsRun]:
+    """
+    Собирает измерения запросов, выполненных внутри блока, и записывает сводку в лог.
+    Запросы из потоков пула учитываются, если задача запущена через
+    contextvars.copy_context().run.
+    """
+    run = MetricsRun(name)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        if run.requests:
+            logger.info(run.summary())
+
+
+def finish_metrics(metrics: Optional[RequestMetrics]) -> None:
+    """
+    Фиксирует длительность запроса и передаёт измерения запуску, выполнившему запрос.
+    Повторные вызовы для одного запроса игнорируются.
+    """
+    if metrics is None or metrics.finished:
+        return
+    metrics.finished = True
+    metrics.duration = time.perf_counter() - metrics.started
+    logger.debug(str(metrics))
+    if metrics.run is not None:
+        metrics.run.add(metrics)
+
+
+# Время установки соединений текущего запроса в текущем потоке
+_connect_timing = threading.local()
+
+
+class _TimedConnectionMixin:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.value = getattr(_connect_timing, "value", 0.0) + time.perf_counter() - started
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter, который измеряет установку соединения, время до первого байта
+    и повторы каждого запроса и прикрепляет их к ответу как response.metrics.
+    Объём и длительность потоковых ответов фиксируются при чтении тела
+    (download_utils.monitor_chunks).
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        metrics = RequestMetrics(request.url, run=_current_run.get())
+        _connect_timing.value = 0.0
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        except Exception as e:
+            metrics.connect = _connect_timing.value
+            metrics.error = type(e).__name__
+            finish_metrics(metrics)
+            raise
+        metrics.connect = _connect_timing.value
+        metrics.ttfb = time.perf_counter() - metrics.started
+        metrics.status = response.status_code
+        retries = getattr(response.raw, "retries", None)
+        metrics.retries = len(retries.history) if retries is not None else 0
+        response.metrics = metrics
+        if not stream:
+            metrics.bytes = len(response.content)
+            finish_metrics(metrics)
+        elif response.status_code not in (200, 206):
+            finish_metrics(metrics)
+        return response
+
+
+def file_url_to_path(url: str) -> str:
+    """
+    Переводит адрес file:// в путь: file:///C:/mirror/a.txt -> C:\\mirror\\a.txt,
+    file://server/share/a.txt -> \\\\server\\share\\a.txt.
+    """
+    parsed = urlparse(url)
+    path = url2pathname(parsed.path)
+    if parsed.netloc and parsed.netloc.lower() != "localhost":
+        path = "\\\\" + parsed.netloc + path.replace("/", "\\") if os.name == "nt" else "//" + parsed.netloc + path
+    return path
+
+
+class FileAdapter(BaseAdapter):
+    """
+    Транспорт requests для адресов file://, чтобы локальный каталог или сетевая
+    папка могли служить зеркалом обновлений. Поддерживает ETag, If-None-Match
+    и Range/If-Range, как обычный HTTP-сервер.
+    """
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict()
+        path = file_url_to_path(request.url)
+        try:
+            stat = os.stat(path)
+            handle = open(path, "rb")
+        except OSError:
+            response.status_code = 404
+            response.reason = "Not Found"
+            response.raw = io.BytesIO(b"")
+            return response
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        if request.headers.get("If-None-Match") == etag:
+            handle.close()
+            response.status_code = 304
+            response.reason = "Not Modified"
+            response.raw = io.BytesIO(b"")
+            return response
+
+        offset = 0
+        range_header = request.headers.get("Range", "")
+        if_range = request.headers.get("If-Range")
+        if range_header.startswith("bytes=") and (if_range is None or if_range == etag):
+            offset = int(range_header[6:].split("-")[0] or 0)
+        if offset >= stat.st_size > 0:
+            handle.close()
+            response.status_code = 416
+            response.reason = "Range Not Satisfiable"
+            response.raw = io.BytesIO(b"")
+            return response
+        if offset:
+            handle.seek(offset)
+            response.status_code = 206
+            response.reason = "Partial Content"
+            response.headers["Content-Range"] = f"bytes {offset}-{stat.st_size - 1}/{stat.st_size}"
+        else:
+            response.status_code = 200
+            response.reason = "OK"
+        response.headers["Content-Length"] = str(stat.st_size - offset)
+        response.raw = handle
+        return response
+
+    def close(self):
+        pass
+
+
+class ClientSession(requests.Session):
+    """
+    Сессия, подставляющая единый таймаут в запросы, где он не указан явно.
+    """
+
+    def __init__(self, timeout: Tuple[float, float] = DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+
+def create_retry(retries: int = MAX_RETRIES) -> Retry:
+    """
+    Политика повторов для идемпотентных запросов. После исчерпания попыток
+    возвращается последний ответ, чтобы вызывающий код мог переключиться на другой источник.
+    """
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, retries: int = MAX_RETRIES) -> requests.Session:
+    """
+    Создаёт HTTP-сессию с пулом keep-alive соединений, повторами и едиными таймаутами.
+
+    :param pool_size: Максимальное число соединений к одному хосту.
+    :param retries: Число повторов при ошибках соединения и ответах 429/5xx.
+    :return: Настроенный экземпляр requests.Session.
+    """
+    session = ClientSession()
+    adapter = InstrumentedAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=create_retry(retries),
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.mount("file://", FileAdapter())
+    return session
+
+
+def get_session(retries: bool = True) -> requests.Session:
+    """
+    Возвращает общую для процесса HTTP-сессию, создавая её при первом обращении.
+    Сессия потокобезопасна для параллельных запросов: соединения берутся из пула.
+
+    :param retries: False — сессия без повторов, для быстрых проверок доступности
+        (например, прокси), где повтор лишь задерживает ответ пользователю.
+    """
+    with _session_lock:
+        if retries not in _sessions:
+            _sessions[retries] = create_session(retries=MAX_RETRIES if retries else 0)
+            logger.debug(f"Создана общая HTTP-сессия (повторы: {'да' if retries else 'нет'})")
+        return _sessions[retries]
@@ -0,0 +1,129 @@
+import bisect
+import ipaddress
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.domain_store import read_domain_list
+from utils.download_utils import atomic_replace, discard_temp, stream_to_temp
+
+logger = logging.getLogger("IpsetUtils")
+
+IpNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+IpAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+@dataclass
+class IpsetStats:
+    """
+    Статистика сжатия списка адресов.
+    """
+    before: int = 0
+    after: int = 0
+    invalid: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.before} -> {self.after} (некорректные: {self.invalid})"
+
+
+def parse_networks(lines: Iterable[str], stats: Optional[IpsetStats] = None) -> Iterator[IpNetwork]:
+    """
+    Разбирает строки с адресами и подсетями, пропуская некорректные.
+    """
+    for line in lines:
+        if stats is not None:
+            stats.before += 1
+        try:
+            yield ipaddress.ip_network(line.strip(), strict=False)
+        except ValueError:
+            if stats is not None:
+                stats.invalid += 1
+            logger.debug(f"Пропущена некорректная запись ipset: {line.strip()}")
+
+
+def read_networks(path: str, stats: Optional[IpsetStats] = None) -> Iterator[IpNetwork]:
+    """
+    Построчно читает список адресов и подсетей из файла.
+    """
+    return parse_networks(read_domain_list(path), stats)
+
+
+def aggregate_networks(networks: Iterable[IpNetwork]) -> List[IpNetwork]:
+    """
+    Объединяет смежные и перекрывающиеся подсети IPv4 и IPv6 в минимальный набор.
+    """
+    by_version: Dict[int, List[IpNetwork]] = {4: [], 6: []}
+    for network in networks:
+        by_version[network.version].append(network)
+    return list(ipaddress.collapse_addresses(by_version[4])) + list(ipaddress.collapse_addresses(by_version[6]))
+
+
+def format_network(network: IpNetwork) -> str:
+    """
+    Записывает подсеть из одного адреса без префикса, как в исходных списках.
+    """
+    if network.prefixlen == network.max_prefixlen:
+        return str(network.network_address)
+    return str(network)
+
+
+def compile_ipset_file(path: str, output_path: Optional[str] = None) -> IpsetStats:
+    """
+    Сжимает список адресов в файле и атомарно записывает результат.
+
+    :param path: Исходный файл.
+    :param output_path: Файл для результата, по умолчанию исходный.
+    :return: Статистика до/после.
+    """
+    output_path = output_path or path
+    stats = IpsetStats()
+    networks = aggregate_networks(read_networks(path, stats))
+    stats.after = len(networks)
+    data = "".join(format_network(network) + "\n" for network in networks).encode("utf-8")
+    temp_path, _, _ = stream_to_temp([data], output_path)
+    try:
+        atomic_replace(temp_path, output_path)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+    logger.debug(f"{output_path}: {stats}")
+    return stats
+
+
+class IpIntervalTable:
+    """
+    Таблица непересекающихся интервалов адресов с поиском за O(log n).
+    """
+
+    def __init__(self, networks: Iterable[IpNetwork]):
+        self.starts: Dict[int, List[int]] = {4: [], 6: []}
+        self.ends: Dict[int, List[int]] = {4: [], 6: []}
+        for network in aggregate_networks(networks):
+            self.starts[network.version].append(int(network.network_address))
+            self.ends[network.version].append(int(network.broadcast_address))
+
+    @classmethod
+    def from_file(cls, path: str) -> "IpIntervalTable":
+        return cls(read_networks(path))
+
+    def __len__(self) -> int:
+        return len(self.starts[4]) + len(self.starts[6])
+
+    def find(self, address: IpAddress) -> Optional[Tuple[int, int]]:
+        """
+        Возвращает границы интервала, содержащего адрес, или None.
+        """
+        starts = self.starts[address.version]
+        value = int(address)
+        index = bisect.bisect_right(starts, value) - 1
+        if index >= 0 and value <= self.ends[address.version][index]:
+            return starts[index], self.ends[address.version][index]
+        return None
+
+    def contains(self, address: Union[str, IpAddress]) -> bool:
+        """
+        Проверяет, входит ли адрес в список.
+        """
+        if isinstance(address, str):
+            address = ipaddress.ip_address(address)
+        return self.find(address) is not None
@@ -0,0 +1,154 @@
+import logging
+import os
+import shutil
+import zipfile
+import zlib
+from typing import List, Optional
+
+import psutil
+
+from utils.utils import tr
+
+logger = logging.getLogger("StagedUpdate")
+
+# Суффиксы соседних каталогов: новая версия до переключения и предыдущая версия после него
+STAGING_SUFFIX = ".staging"
+PREVIOUS_SUFFIX = ".prev"
+
+
+def staging_dir(target_dir: str) -> str:
+    return target_dir.rstrip("\\/") + STAGING_SUFFIX
+
+
+def previous_dir(target_dir: str) -> str:
+    return target_dir.rstrip("\\/") + PREVIOUS_SUFFIX
+
+
+def prepare_staging(target_dir: str, skip: Optional[List[str]] = None) -> str:
+    """
+    Готовит каталог для новой версии: копия текущего каталога без архивов.
+    Незавершённые загрузки (*.part*) в каталоге не удаляются, чтобы их можно было докачать.
+
+    :param target_dir: Рабочий каталог компонента.
+    :param skip: Имена файлов, которые не нужно копировать.
+    :return: Путь к каталогу для новой версии.
+    """
+    skip = [name.lower() for name in (skip or [])]
+    staging = staging_dir(target_dir)
+    os.makedirs(staging, exist_ok=True)
+    for name in os.listdir(staging):
+        if ".part" in name:
+            continue
+        path = os.path.join(staging, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    if os.path.isdir(target_dir):
+        shutil.copytree(
+            target_dir,
+            staging,
+            dirs_exist_ok=True,
+            ignore=lambda _, names: [name for name in names if name.lower() in skip or ".part" in name],
+        )
+    return staging
+
+
+def file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def changed_members(zip_ref: zipfile.ZipFile, directory: str) -> List[zipfile.ZipInfo]:
+    """
+    Сравнивает элементы архива с установленными файлами по размеру и CRC32
+    из центрального каталога zip и возвращает только отличающиеся.
+    """
+    changed = []
+    for info in zip_ref.infolist():
+        if info.is_dir():
+            continue
+        path = os.path.join(directory, info.filename)
+        try:
+            if os.path.getsize(path) == info.file_size and file_crc32(path) == info.CRC:
+                continue
+        except OSError:
+            pass
+        changed.append(info)
+    return changed
+
+
+def apply_files(staging: str, target_dir: str, names: List[str]) -> None:
+    """
+    Переносит отдельные файлы из подготовленного каталога в рабочий без
+    переключения каталогов. Прежнее содержимое рабочего каталога сохраняется
+    в каталоге предыдущей версии.
+    """
+    previous = previous_dir(target_dir)
+    if os.path.isdir(previous):
+        shutil.rmtree(previous)
+    shutil.copytree(target_dir, previous, ignore=lambda _, entries: [name for name in entries if ".part" in name])
+    for name in names:
+        target = os.path.join(target_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(os.path.join(staging, name), target)
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def swap_directories(staging: str, target_dir: str) -> None:
+    """
+    Переключает каталоги: текущий становится предыдущей версией, подготовленный — текущим.
+    При ошибке второго переименования текущий каталог возвращается на место.
+    """
+    previous = previous_dir(target_dir)
+    if os.path.isdir(previous):
+        shutil.rmtree(previous)
+    if os.path.isdir(target_dir):
+        os.replace(target_dir, previous)
+    try:
+        os.replace(staging, target_dir)
+    except OSError:
+        if os.path.isdir(previous) and not os.path.exists(target_dir):
+            os.replace(previous, target_dir)
+        raise
+
+
+def restore_previous(target_dir: str) -> bool:
+    """
+    Возвращает предыдущую версию каталога, текущая становится предыдущей.
+
+    :return: True, если предыдущая версия была найдена.
+    """
+    previous = previous_dir(target_dir)
+    if not os.path.isdir(previous):
+        return False
+    rejected = target_dir.rstrip("\\/") + ".rejected"
+    if os.path.isdir(rejected):
+        shutil.rmtree(rejected)
+    if os.path.isdir(target_dir):
+        os.replace(target_dir, rejected)
+    os.replace(previous, target_dir)
+    if os.path.isdir(rejected):
+        os.replace(rejected, previous)
+    return True
+
+
+def running_command_lines(process_name: str) -> List[List[str]]:
+    """
+    Возвращает командные строки запущенных процессов с указанным именем,
+    чтобы после обновления перезапустить их с теми же аргументами.
+    """
+    commands = []
+    for proc in psutil.process_iter(['pid', 'name']):
+        if proc.info['name'] and proc.info['name'].lower() == process_name.lower():
+            try:
+                cmdline = proc.cmdline()
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                logger.warning(tr(f"Не удалось получить командную строку PID {proc.info['pid']}: {e}"))
+                continue
+            if cmdline:
+                commands.append(cmdline)
+    return commands
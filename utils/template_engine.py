@@ -0,0 +1,141 @@
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.utils import (
+    BASE_FOLDER,
+    BLACKLIST_FILES,
+    BLACKLIST_FOLDER,
+    ZAPRET_FOLDER,
+    tr,
+)
+
+# {NAME} — переменная реестра, {ENV:NAME} — переменная окружения
+PLACEHOLDER_RE = re.compile(r"\{(?P<name>(?:ENV:)?[A-Za-z_][A-Za-z0-9_]*)\}", re.IGNORECASE)
+ENV_PREFIX = "ENV:"
+
+
+class TemplateError(ValueError):
+    """
+    В шаблоне используется неизвестная переменная.
+    """
+
+
+class VariableRegistry:
+    """
+    Реестр переменных для подстановки в шаблоны. Имена не зависят от регистра.
+    Реестр профиля создаётся через child() и видит переменные родителя.
+    """
+
+    def __init__(self, variables: Optional[Dict[str, str]] = None, parent: Optional["VariableRegistry"] = None):
+        self.parent = parent
+        self.variables: Dict[str, str] = {}
+        for name, value in (variables or {}).items():
+            self.define(name, value)
+
+    def define(self, name: str, value: str) -> None:
+        self.variables[name.upper()] = value
+
+    def child(self, variables: Optional[Dict[str, str]] = None) -> "VariableRegistry":
+        return VariableRegistry(variables, parent=self)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Возвращает значение переменной или None, если она не определена.
+        """
+        key = name.upper()
+        if key.startswith(ENV_PREFIX):
+            return os.environ.get(name[len(ENV_PREFIX):])
+        registry: Optional[VariableRegistry] = self
+        while registry is not None:
+            if key in registry.variables:
+                return registry.variables[key]
+            registry = registry.parent
+        return None
+
+    def names(self) -> List[str]:
+        names = set(self.variables)
+        if self.parent is not None:
+            names.update(self.parent.names())
+        return sorted(names)
+
+
+# Часть шаблона: строка как есть или имя переменной
+TemplatePart = Union[str, Tuple[str]]
+
+
+class Template:
+    """
+    Шаблон, разобранный один раз на постоянные части и переменные.
+    Подстановка выполняется за один проход без повторного поиска по строке.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts: List[TemplatePart] = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            if match.start() > position:
+                self.parts.append(text[position:match.start()])
+            self.parts.append((match.group("name"),))
+            position = match.end()
+        if position < len(text):
+            self.parts.append(text[position:])
+
+    @property
+    def placeholders(self) -> List[str]:
+        return [part[0] for part in self.parts if isinstance(part, tuple)]
+
+    def render(self, registry: VariableRegistry) -> str:
+        """
+        :raises TemplateError: Если переменная не определена.
+        """
+        result = []
+        for part in self.parts:
+            if isinstance(part, tuple):
+                value = registry.resolve(part[0])
+                if value is None:
+                    raise TemplateError(tr("Неизвестная переменная {{{name}}}").format(name=part[0]))
+                result.append(value)
+            else:
+                result.append(part)
+        return "".join(result)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> Template:
+    """
+    Возвращает разобранный шаблон; одинаковые строки разбираются один раз.
+    """
+    return Template(text)
+
+
+def render(text: str, registry: VariableRegistry) -> str:
+    return compile_template(text).render(registry)
+
+
+def builtin_variables() -> VariableRegistry:
+    """
+    Встроенные переменные: папки программы и все списки BLACKLIST_FILES_<n>.
+    """
+    registry = VariableRegistry({
+        "BASE_FOLDER": BASE_FOLDER,
+        "ZAPRET_FOLDER": ZAPRET_FOLDER,
+        "BLACKLIST_FOLDER": BLACKLIST_FOLDER,
+    })
+    for index, path in enumerate(BLACKLIST_FILES):
+        registry.define(f"BLACKLIST_FILES_{index}", path)
+    return registry
+
+
+def define_variables(registry: VariableRegistry, variables: Iterable[Tuple[str, str]]) -> VariableRegistry:
+    """
+    Добавляет пользовательские переменные по порядку; значение может ссылаться
+    на встроенные, окружение и ранее определённые переменные.
+
+    :raises TemplateError: Если значение ссылается на неизвестную переменную.
+    """
+    for name, value in variables:
+        registry.define(name, render(value, registry))
+    return registry
@@ -0,0 +1,180 @@
+import configparser
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import requests
+
+from utils.download_utils import DownloadCancelledError, DownloadValidationError
+from utils.http_client import get_session
+from utils.utils import BASE_FOLDER, tr
+
+logger = logging.getLogger("UpdateSources")
+
+# Список зеркал обновлений. Пример:
+#
+# [MIRRORS]
+# share = file://fileserver/dpi-penguin
+# lan = http://192.168.1.10:8000
+#
+# [OPTIONS]
+# use_upstream = true
+#
+# Зеркало повторяет структуру папки программы (black/, zapret/, config/,
+# setting_version/), поэтому папка уже обновлённой установки или её копия на
+# общем ресурсе (в том числе раздаваемая через python -m http.server) годится
+# как зеркало для остальных машин.
+UPDATE_SOURCES_FILE = os.path.join(BASE_FOLDER, "setting_version", "update_sources.ini")
+
+# Время, на которое зеркало понижается в приоритете после ошибки; удваивается при повторных ошибках
+SOURCE_COOLDOWN = 10 * 60
+MAX_SOURCE_COOLDOWN = 6 * 60 * 60
+
+# Коды ответа, при которых имеет смысл попробовать следующий источник
+FAILOVER_STATUS_CODES = {404, 408, 429}
+
+T = TypeVar("T")
+
+
+def relative_path(path: str) -> str:
+    """
+    Путь файла относительно папки программы в формате URL: "black/universal.txt".
+    """
+    return os.path.relpath(path, BASE_FOLDER).replace(os.sep, "/")
+
+
+class UpdateSources:
+    """
+    Упорядоченный список источников обновлений с переключением при сбоях.
+
+    Сначала опрашиваются исправные зеркала в порядке из update_sources.ini,
+    затем недавно сбоившие, и в конце — исходный адрес (GitHub и т.п.).
+    Настройки перечитываются при изменении файла.
+    """
+
+    def __init__(self, config_path: str = UPDATE_SOURCES_FILE):
+        self.config_path = config_path
+        self.mirrors: List[str] = []
+        self.use_upstream = True
+        self.failures: Dict[str, Tuple[int, float]] = {}
+        self.lock = threading.Lock()
+        self._config_mtime: Optional[int] = None
+
+    def _reload(self) -> None:
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._config_mtime:
+            return
+        self._config_mtime = mtime
+        self.mirrors = []
+        self.use_upstream = True
+        if mtime is None:
+            return
+        config = configparser.ConfigParser()
+        try:
+            config.read(self.config_path, encoding="utf-8")
+        except configparser.Error as e:
+            logger.error(tr(f"Ошибка чтения {self.config_path}: {e}"))
+            return
+        if config.has_section("MIRRORS"):
+            self.mirrors = [value.strip().rstrip("/") for value in config["MIRRORS"].values() if value.strip()]
+        self.use_upstream = config.getboolean("OPTIONS", "use_upstream", fallback=True)
+        logger.info(tr(f"Зеркала обновлений: {', '.join(self.mirrors) or 'нет'}"))
+
+    def _is_healthy(self, source: str) -> bool:
+        count, failed_at = self.failures.get(source, (0, 0.0))
+        if not count:
+            return True
+        cooldown = min(SOURCE_COOLDOWN * 2 ** (count - 1), MAX_SOURCE_COOLDOWN)
+        return time.monotonic() - failed_at >= cooldown
+
+    def candidates(self, url: str, path: str) -> List[Tuple[str, str]]:
+        """
+        Возвращает адреса файла в порядке опроса.
+
+        :param url: Исходный адрес файла.
+        :param path: Путь файла относительно папки программы.
+        :return: Список пар (источник, адрес).
+        """
+        with self.lock:
+            self._reload()
+            mirrors = [(mirror, f"{mirror}/{path}") for mirror in self.mirrors]
+            healthy = [item for item in mirrors if self._is_healthy(item[0])]
+            degraded = [item for item in mirrors if not self._is_healthy(item[0])]
+            upstream = [(url, url)] if self.use_upstream or not mirrors else []
+        return healthy + degraded + upstream
+
+    def mark(self, source: str, ok: bool) -> None:
+        """
+        Записывает результат обращения к источнику.
+        """
+        with self.lock:
+            if ok:
+                self.failures.pop(source, None)
+            else:
+                count, _ = self.failures.get(source, (0, 0.0))
+                self.failures[source] = (count + 1, time.monotonic())
+
+    def get(self, url: str, path: str, cancel_event: Optional[threading.Event] = None, **kwargs) -> requests.Response:
+        """
+        Выполняет GET к первому отвечающему источнику.
+
+        :param url: Исходный адрес файла.
+        :param path: Путь файла относительно папки программы.
+        :param cancel_event: Установленное событие прекращает опрос перед следующим источником.
+        :param kwargs: Параметры requests (headers, stream, timeout).
+        :return: Ответ источника; если все источники вернули ошибку, ответ последнего.
+        :raises requests.RequestException: Если ни один источник недоступен.
+        :raises DownloadCancelledError: Если установлен cancel_event.
+        """
+        candidates = self.candidates(url, path)
+        last_error: Optional[Exception] = None
+        for index, (source, candidate) in enumerate(candidates):
+            if cancel_event is not None and cancel_event.is_set():
+                raise DownloadCancelledError(tr("Загрузка отменена"))
+            try:
+                response = get_session().get(candidate, **kwargs)
+            except requests.RequestException as e:
+                last_error = e
+                self.mark(source, False)
+                logger.warning(tr(f"Источник {source} недоступен: {e}"))
+                continue
+            failed = response.status_code >= 500 or response.status_code in FAILOVER_STATUS_CODES
+            if failed and index < len(candidates) - 1:
+                self.mark(source, False)
+                logger.warning(tr(f"Источник {source} вернул код {response.status_code} для {path}"))
+                response.close()
+                continue
+            self.mark(source, not failed)
+            if source != url:
+                logger.debug(f"{path} получен с зеркала {source}")
+            return response
+        raise last_error
+
+    def fetch(self, url: str, path: str, download: Callable[[str], T]) -> T:
+        """
+        Вызывает download(адрес) для источников по очереди, пока загрузка
+        не завершится успешно. Подходит для загрузок с докачкой и проверкой хеша.
+
+        :raises OSError | DownloadValidationError: Ошибка последнего источника.
+        """
+        last_error: Optional[Exception] = None
+        for source, candidate in self.candidates(url, path):
+            try:
+                result = download(candidate)
+            except (OSError, DownloadValidationError) as e:
+                last_error = e
+                self.mark(source, False)
+                logger.warning(tr(f"Не удалось загрузить {path} из {source}: {e}"))
+                continue
+            self.mark(source, True)
+            return result
+        raise last_error
+
+
+# Общий для процесса список источников
+update_sources = UpdateSources()
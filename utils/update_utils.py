@@ -1,41 +1,199 @@
 import configparser
-import io
+import contextvars
+import hashlib
+import json
 import logging
 import os
+import threading
 import zipfile
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import requests
 from packaging.version import parse as parse_version
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from utils.download_utils import (
+    CHUNK_SIZE,
+    DownloadCancelledError,
+    DownloadValidationError,
+    atomic_replace,
+    content_length,
+    discard_temp,
+    download_resumable,
+    iter_decompressed,
+    monitor_chunks,
+    stream_to_temp,
+    validate_list_file,
+    write_stream_atomically,
+)
+from utils.blacklist_journal import BlacklistJournal, diff_files
+from utils.delta_utils import DeltaPatchError, apply_bsdiff
+from utils.domain_store import DOMAIN_STORE_PATH, rebuild_domain_store
+from utils.hostlist_utils import minimize_hostlist_file
+from utils.http_client import get_session, record_metrics
+from utils.ipset_utils import compile_ipset_file
 from utils.process_utils import ProcessUtils
-from utils.utils import BASE_FOLDER, CURRENT_VERSION, tr
+from utils.update_sources import relative_path, update_sources
+from utils.staged_update import (
+    apply_files,
+    changed_members,
+    prepare_staging,
+    previous_dir,
+    restore_previous,
+    running_command_lines,
+    swap_directories,
+)
+from utils.utils import BASE_FOLDER, CURRENT_VERSION, settings, tr
+
+# Файл с валидаторами (ETag, Last-Modified, хеш) для каждого черного списка
+BLACKLISTS_STATE_FILE = os.path.join(BASE_FOLDER, "setting_version", "blacklists_state.json")
+
+# Результаты обновления отдельного черного списка
+BLACKLIST_UNCHANGED = "unchanged"
+BLACKLIST_UPDATED = "updated"
+BLACKLIST_FAILED = "failed"
+
+# Число одновременных загрузок черных списков по умолчанию
+DEFAULT_BLACKLIST_WORKERS = 4
+# Ручное и плановое обновления черных списков не выполняются одновременно:
+# оба читают и записывают blacklists_state.json и одни и те же файлы списков
+_blacklists_update_lock = threading.Lock()
+
+
+def blacklists_update_running() -> bool:
+    return _blacklists_update_lock.locked()
+
+VERSION_MANIFEST_URL = "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/setting_version/version_config.ini"
+# Путь version_config.ini на зеркалах обновлений
+VERSION_MANIFEST_PATH = "setting_version/version_config.ini"
+# Кеш удалённого version_config.ini на диске
+MANIFEST_CACHE_FILE = os.path.join(BASE_FOLDER, "setting_version", "manifest_cache.json")
+# Время жизни кеша удалённого version_config.ini в секундах по умолчанию
+DEFAULT_MANIFEST_TTL = 300
+
+
+class ManifestCache:
+    """
+    Общий для процесса кеш удалённого version_config.ini.
+    В пределах TTL все потребители получают один и тот же ответ без сетевого
+    запроса; по истечении TTL выполняется условный запрос с If-None-Match.
+    Копия сохраняется на диск, чтобы переживать перезапуск приложения.
+    """
+
+    def __init__(self, url: str = VERSION_MANIFEST_URL, cache_file: Optional[str] = MANIFEST_CACHE_FILE):
+        self.url = url
+        self.cache_file = cache_file
+        self.text: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._load_from_disk()
+
+    def ttl(self) -> int:
+        return settings.value("manifest_cache_ttl", DEFAULT_MANIFEST_TTL, type=int)
+
+    def _load_from_disk(self) -> None:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.text = data.get('text')
+            self.etag = data.get('etag')
+            self.fetched_at = float(data.get('fetched_at', 0))
+        except (OSError, ValueError) as e:
+            self.logger.warning(tr(f"Не удалось прочитать кеш {self.cache_file}: {e}"))
+
+    def _save_to_disk(self) -> None:
+        if not self.cache_file or not settings.value("manifest_cache_on_disk", True, type=bool):
+            return
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'text': self.text, 'etag': self.etag, 'fetched_at': self.fetched_at}, f, ensure_ascii=False)
+        except OSError as e:
+            self.logger.warning(tr(f"Не удалось сохранить кеш {self.cache_file}: {e}"))
+
+    def get(self, force_refresh: bool = False, cancel_event: Optional[threading.Event] = None) -> Optional[str]:
+        """
+        Возвращает текст удалённого version_config.ini.
+
+        :param force_refresh: Игнорировать TTL и запросить файл заново.
+        :param cancel_event: Установленное событие прекращает опрос источников.
+        :return: Текст файла или None, если получить его не удалось.
+        """
+        with self.lock:
+            if not force_refresh and self.text is not None and time.time() - self.fetched_at < self.ttl():
+                return self.text
+
+            headers = {}
+            if force_refresh:
+                headers['Cache-Control'] = 'no-cache'
+            elif self.text is not None and self.etag:
+                headers['If-None-Match'] = self.etag
+            try:
+                response = update_sources.get(self.url, VERSION_MANIFEST_PATH, cancel_event=cancel_event, headers=headers)
+            except DownloadCancelledError:
+                return self.text
+            except requests.RequestException as e:
+                self.logger.error(tr(f"Ошибка запроса к GitHub: {e}"))
+                return self.text
+
+            if response.status_code == 304 and self.text is not None:
+                self.fetched_at = time.time()
+            elif response.status_code == 200:
+                self.text = response.text
+                self.etag = response.headers.get('ETag')
+                self.fetched_at = time.time()
+            else:
+                self.logger.warning(tr(f"Не удалось получить удалённую версию. Код ответа: {response.status_code}"))
+                return self.text
+            self._save_to_disk()
+            return self.text
+
+    def invalidate(self) -> None:
+        """
+        Сбрасывает кеш, следующий вызов get() выполнит запрос.
+        """
+        with self.lock:
+            self.fetched_at = 0.0
+
+
+manifest_cache = ManifestCache()
 
 
 class UpdateChecker(QObject):
     config_updated_signal = pyqtSignal()
+    # Процессы компонента сейчас будут остановлены для переключения версий
+    processes_stopping_signal = pyqtSignal()
+    # Переключение завершено; командные строки процессов, которые были остановлены
+    processes_stopped_signal = pyqtSignal(list)
 
     BLACKLISTS: List[Dict[str, str]] = [
         {
             "name": "russia-blacklist",
             "url": "https://p.thenewone.lol/domains-export.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "russia-blacklist.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "russia-blacklist.txt"),
+            "type": "hostlist"
         },
         {
             "name": "discord-blacklist",
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/black/universal.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "universal.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "universal.txt"),
+            "type": "hostlist"
         },
         {
             "name": "disk-youtube-blacklist",
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/black/disk-youtube-blacklist.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "disk-youtube-blacklist.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "disk-youtube-blacklist.txt"),
+            "type": "hostlist"
         },
         {
             "name": "ipset-discord",
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/black/ipset-discord.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "ipset-discord.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "ipset-discord.txt"),
+            "type": "ipset"
         }
     ]
 
@@ -48,7 +206,10 @@ class UpdateChecker(QObject):
             "pre_update_args": {
                 "terminate_process": {"process_name": "winws.exe"},
                 "stop_service": {"service_name": "WinDivert"}
-            }
+            },
+            "restart_process": "winws.exe",
+            # Файлы, замена которых требует остановки winws и драйвера
+            "restart_members": ["winws.exe", "WinDivert.dll", "WinDivert64.sys", "cygwin1.dll"]
         },
         "config": {
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/config/default.ini",
@@ -63,6 +224,15 @@ class UpdateChecker(QObject):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.local_versions: Dict[str, str] = {}
         self.remote_versions: Dict[str, str] = {}
+        self.remote_hashes: Dict[str, str] = {}
+        self.remote_deltas: Dict[str, str] = {}
+        self.blacklist_results: Dict[str, str] = {}
+        self.blacklist_changes: Dict[str, Tuple[int, int]] = {}
+        self.journal = BlacklistJournal()
+        # Обратный вызов прогресса загрузки компонентов: (компонент, получено, всего)
+        self.progress_callback: Optional[Callable[[str, int, Optional[int]], None]] = None
+        # Установка события прерывает текущую загрузку компонента
+        self.cancel_event = threading.Event()
 
     def get_local_versions(self) -> None:
         version_file_path = os.path.join(BASE_FOLDER, "setting_version", "version_config.ini")
@@ -80,23 +250,51 @@ class UpdateChecker(QObject):
             versions['ver_programm'] = CURRENT_VERSION
         self.local_versions = versions
 
-    def get_remote_versions(self) -> None:
+    def get_remote_versions(self, force_refresh: bool = False) -> None:
+        """
+        Получает удалённые версии компонентов через общий кеш manifest_cache.
+
+        :param force_refresh: Запросить version_config.ini заново, минуя кеш.
+        """
         versions: Dict[str, str] = {}
-        version_url = f"https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/setting_version/version_config.ini?t={int(time.time())}"
+        hashes: Dict[str, str] = {}
+        deltas: Dict[str, str] = {}
+        text = manifest_cache.get(force_refresh=force_refresh, cancel_event=self.cancel_event)
+        if text is not None:
+            config = configparser.ConfigParser()
+            try:
+                config.read_string(text)
+            except configparser.Error as e:
+                self.logger.error(tr(f"Ошибка разбора удалённого version_config.ini: {e}"))
+            if 'VERSION' in config:
+                versions = {k: v.strip() for k, v in config['VERSION'].items()}
+            else:
+                self.logger.warning(tr("Удалённый файл версии не содержит секцию [VERSION]"))
+            if 'SHA256' in config:
+                hashes = {k: v.strip() for k, v in config['SHA256'].items()}
+            if 'DELTA' in config:
+                deltas = {k: v.strip() for k, v in config['DELTA'].items()}
+        self.remote_versions = versions
+        self.remote_hashes = hashes
+        self.remote_deltas = deltas
+
+    def get_expected_sha256(self, component: str, url: str) -> Optional[str]:
+        """
+        Возвращает SHA-256 компонента из секции [SHA256] удалённого version_config.ini,
+        а если его там нет — из файла-спутника <url>.sha256.
+        """
+        if self.remote_hashes.get(component):
+            return self.remote_hashes[component]
+        path = relative_path(self.COMPONENTS[component]['destination']) + ".sha256"
         try:
-            response = requests.get(version_url, timeout=10)
+            response = update_sources.get(f"{url}.sha256", path, cancel_event=self.cancel_event)
             if response.status_code == 200:
-                config = configparser.ConfigParser()
-                config.read_string(response.text)
-                if 'VERSION' in config:
-                    versions = {k: v.strip() for k, v in config['VERSION'].items()}
-                else:
-                    self.logger.warning(tr("Удалённый файл версии не содержит секцию [VERSION]"))
-            else:
-                self.logger.warning(tr(f"Не удалось получить удалённую версию. Код ответа: {response.status_code}"))
+                value = response.text.split()[0] if response.text.split() else ""
+                if len(value) == 64:
+                    return value
         except requests.RequestException as e:
-            self.logger.error(tr(f"Ошибка запроса к GitHub: {e}"))
-        self.remote_versions = versions
+            self.logger.debug(f"Файл {url}.sha256 недоступен: {e}")
+        return None
 
     def is_update_available(self, component: str) -> bool:
         local_version = self.local_versions.get(component)
@@ -117,26 +315,38 @@ class UpdateChecker(QObject):
         if not component_info:
             self.logger.error(tr(f"Неизвестный компонент для обновления: {component}"))
             return False
-        try:
-            if 'pre_update' in component_info:
-                for method_name in component_info['pre_update']:
-                    method = getattr(self, method_name, None)
-                    if method:
-                        args = component_info.get('pre_update_args', {}).get(method_name, {})
-                        method(**args)
-                    else:
-                        self.logger.warning(tr(f"Метод {method_name} не найден в UpdateChecker."))
-
-            self.logger.info(tr(f"Скачивание {component} с {component_info['url']}"))
-            response = requests.get(component_info['url'], stream=True, timeout=30)
-            if response.status_code == 200:
+        with record_metrics(tr(f"Обновление {component}")):
+            try:
+                self.logger.info(tr(f"Скачивание {component} с {component_info['url']}"))
                 os.makedirs(os.path.dirname(component_info['destination']), exist_ok=True)
+                progress = self._component_progress(component)
                 if component_info.get('extract'):
-                    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_ref:
-                        zip_ref.extractall(os.path.dirname(component_info['destination']))
+                    self.install_staged(component, component_info, progress)
                 else:
-                    with open(component_info['destination'], "w", encoding='utf-8') as f:
-                        f.write(response.text)
+                    self.run_pre_update(component_info)
+                    with update_sources.get(
+                        component_info['url'],
+                        relative_path(component_info['destination']),
+                        cancel_event=self.cancel_event,
+                        stream=True,
+                    ) as response:
+                        if response.status_code != 200:
+                            self.logger.warning(tr(f"Не удалось скачать {component}. Статус код: {response.status_code}"))
+                            return False
+                        write_stream_atomically(
+                            iter_decompressed(
+                                monitor_chunks(
+                                    response.iter_content(chunk_size=CHUNK_SIZE),
+                                    content_length(response),
+                                    progress,
+                                    self.cancel_event,
+                                    metrics=getattr(response, 'metrics', None),
+                                ),
+                                component_info.get('compression', 'auto'),
+                                component_info['url'],
+                            ),
+                            component_info['destination'],
+                        )
                 self.logger.info(tr(f"{component} успешно обновлён."))
 
                 # Обработка post_update
@@ -147,52 +357,374 @@ class UpdateChecker(QObject):
 
                 self.update_local_version_file()
                 return True
-            else:
-                self.logger.warning(tr(f"Не удалось скачать {component}. Статус код: {response.status_code}"))
+            except Exception as e:
+                self.logger.error(tr(f"Ошибка при обновлении {component}: {e}"))
                 return False
+
+    def run_pre_update(self, component_info: Dict[str, Any]) -> None:
+        """
+        Выполняет действия pre_update компонента (остановка процессов и служб).
+        """
+        for method_name in component_info.get('pre_update', []):
+            method = getattr(self, method_name, None)
+            if method:
+                args = component_info.get('pre_update_args', {}).get(method_name, {})
+                method(**args)
+            else:
+                self.logger.warning(tr(f"Метод {method_name} не найден в UpdateChecker."))
+
+    def install_staged(self, component: str, component_info: Dict[str, Any], progress=None) -> None:
+        """
+        Обновляет компонент-архив поэтапно: загрузка, проверка и распаковка
+        выполняются в соседнем каталоге, пока winws продолжает работать;
+        остановка, переключение каталогов и перезапуск занимают доли секунды.
+        Предыдущая версия остаётся в каталоге *.prev для быстрого отката.
+        """
+        target_dir = os.path.dirname(component_info['destination'])
+        archive_name = os.path.basename(component_info['destination'])
+        staging = prepare_staging(target_dir, skip=[archive_name])
+
+        expected_sha256 = self.get_expected_sha256(component, component_info['url'])
+        archive_path = None
+        if expected_sha256:
+            archive_path = self.apply_delta(component, component_info, os.path.join(staging, archive_name), expected_sha256)
+        if archive_path is None:
+            archive_path = update_sources.fetch(
+                component_info['url'],
+                relative_path(component_info['destination']),
+                lambda url: download_resumable(
+                    get_session(),
+                    url,
+                    os.path.join(staging, archive_name),
+                    expected_sha256=expected_sha256,
+                    progress=progress,
+                    cancel_event=self.cancel_event,
+                ),
+            )
+        changed = self.extract_archive(archive_path, staging)
+        if self.cancel_event.is_set():
+            raise DownloadCancelledError(tr("Загрузка отменена"))
+
+        restart_members = {name.lower() for name in component_info.get('restart_members', [])}
+        if any(os.path.basename(name).lower() in restart_members for name in changed):
+            self.switch_component(component, component_info, lambda: swap_directories(staging, target_dir))
+        else:
+            # Исполняемые файлы и драйвер не изменились: заменяем файлы без остановки winws
+            apply_files(staging, target_dir, changed + [archive_name])
+            self.logger.info(tr(f"{component}: обновлено без остановки процессов ({len(changed)} файлов)"))
+
+    def apply_delta(self, component: str, component_info: Dict[str, Any], target_path: str,
+                    expected_sha256: str) -> Optional[str]:
+        """
+        Собирает новую версию архива из установленной и бинарного патча (BSDIFF40).
+        Патч объявляется в секции [DELTA] удалённого version_config.ini ключом
+        <компонент>_<установленная версия>, например: zapret_70 = <url патча>.
+
+        :param target_path: Куда записать собранный архив.
+        :param expected_sha256: SHA-256 новой версии архива.
+        :return: Путь к проверенному архиву или None, если нужна полная загрузка.
+        """
+        installed = component_info['destination']
+        delta_url = self.remote_deltas.get(f"{component}_{self.local_versions.get(component)}")
+        if not delta_url or not os.path.exists(installed):
+            return None
+        delta_path = f"{os.path.dirname(relative_path(installed))}/{os.path.basename(delta_url)}"
+        try:
+            with update_sources.get(delta_url, delta_path, cancel_event=self.cancel_event) as response:
+                if response.status_code != 200:
+                    self.logger.warning(tr(f"Патч {delta_url} недоступен. Статус код: {response.status_code}"))
+                    return None
+                patch = response.content
+            with open(installed, 'rb') as f:
+                data = apply_bsdiff(f.read(), patch)
+        except (requests.RequestException, OSError, DeltaPatchError) as e:
+            self.logger.warning(tr(f"Не удалось применить патч {component}: {e}"))
+            return None
+
+        if hashlib.sha256(data).hexdigest().lower() != expected_sha256.lower():
+            self.logger.warning(tr(f"SHA-256 {component} после применения патча не совпадает, загружается полный архив"))
+            return None
+        temp_path, _, _ = stream_to_temp([data], target_path)
+        try:
+            atomic_replace(temp_path, target_path)
+        except BaseException:
+            discard_temp(temp_path)
+            raise
+        self.logger.info(tr(f"{component}: применён патч {len(patch)} байт вместо загрузки {len(data)} байт"))
+        return target_path
+
+    def switch_component(self, component: str, component_info: Dict[str, Any], switch: Callable[[], None]) -> List[List[str]]:
+        """
+        Останавливает процессы компонента и выполняет переключение. Процессы
+        не перезапускаются здесь: ими владеет главное окно, которое перезапускает
+        их по сигналу processes_stopped_signal. Логирует время простоя.
+
+        :return: Командные строки остановленных процессов.
+        """
+        process_name = component_info.get('restart_process')
+        commands = running_command_lines(process_name) if process_name else []
+        if commands:
+            self.processes_stopping_signal.emit()
+        stopped_at = time.perf_counter()
+        self.run_pre_update(component_info)
+        try:
+            switch()
+        finally:
+            downtime = time.perf_counter() - stopped_at
+            if commands:
+                self.logger.info(tr(
+                    f"{component}: остановлено процессов {len(commands)}, "
+                    f"переключение выполнено за {downtime * 1000:.0f} мс"
+                ))
+                self.processes_stopped_signal.emit(commands)
+            else:
+                self.logger.info(tr(f"{component}: переключение выполнено за {downtime * 1000:.0f} мс, перезапуск не требуется"))
+        return commands
+
+    def rollback_component(self, component: str) -> bool:
+        """
+        Возвращает предыдущую версию компонента из каталога *.prev.
+
+        :return: True, если откат выполнен.
+        """
+        component_info = self.COMPONENTS.get(component)
+        if not component_info or not component_info.get('extract'):
+            self.logger.error(tr(f"Откат недоступен для компонента {component}"))
+            return False
+        target_dir = os.path.dirname(component_info['destination'])
+        if not os.path.isdir(previous_dir(target_dir)):
+            self.logger.warning(tr(f"Предыдущая версия {component} не найдена"))
+            return False
+        try:
+            self.switch_component(component, component_info, lambda: restore_previous(target_dir))
         except Exception as e:
-            self.logger.error(tr(f"Ошибка при обновлении {component}: {e}"))
+            self.logger.error(tr(f"Ошибка при откате {component}: {e}"))
             return False
+        self.logger.info(tr(f"{component}: восстановлена предыдущая версия"))
+        return True
+
+    def _component_progress(self, component: str) -> Optional[Callable[[int, Optional[int]], None]]:
+        if self.progress_callback is None:
+            return None
+        return lambda done, total: self.progress_callback(component, done, total)
+
+    def extract_archive(self, archive_path: str, destination: str) -> List[str]:
+        """
+        Проверяет целостность архива и распаковывает только те файлы,
+        размер или CRC32 которых отличается от уже установленных.
+
+        :return: Имена распакованных файлов.
+        :raises DownloadValidationError: Если архив повреждён.
+        """
+        with zipfile.ZipFile(archive_path) as zip_ref:
+            broken = zip_ref.testzip()
+            if broken is not None:
+                raise DownloadValidationError(tr(f"Повреждён файл {broken} в архиве {archive_path}"))
+            changed = changed_members(zip_ref, destination)
+            for info in changed:
+                zip_ref.extract(info, destination)
+            total = len([info for info in zip_ref.infolist() if not info.is_dir()])
+        self.logger.info(tr(f"Распаковано изменённых файлов: {len(changed)} из {total}"))
+        return [info.filename for info in changed]
 
     def update_local_version_file(self) -> None:
         self.logger.info(tr("Обновление локального version_config.ini..."))
         try:
-            version_url = "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/setting_version/version_config.ini"
-            response = requests.get(version_url, timeout=10)
-            if response.status_code == 200:
+            text = manifest_cache.get()
+            if text is not None:
                 version_dir = os.path.join(BASE_FOLDER, "setting_version")
                 os.makedirs(version_dir, exist_ok=True)
                 local_version_file = os.path.join(version_dir, "version_config.ini")
-                with open(local_version_file, "w", encoding='utf-8') as f:
-                    f.write(response.text)
+                write_stream_atomically([text.encode('utf-8')], local_version_file)
                 self.logger.info(tr("Локальный version_config.ini успешно обновлён."))
             else:
-                self.logger.warning(tr(f"Не удалось скачать version_config.ini. Статус код: {response.status_code}"))
+                self.logger.warning(tr("Не удалось скачать version_config.ini."))
         except Exception as e:
             self.logger.error(tr(f"Произошла ошибка при обновлении version_config.ini: {e}"))
             raise e
 
-    def update_blacklists(self) -> bool:
-        success = True
-        for blacklist in self.BLACKLISTS:
-            name = blacklist['name']
-            url = blacklist['url']
-            output_file = blacklist['output_file']
-            self.logger.info(tr(f"Обновление {name} из {url}"))
-            try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(response.text)
-                    self.logger.info(tr(f"{name} успешно обновлён."))
-                else:
+    def load_blacklists_state(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Загружает сохранённые валидаторы черных списков.
+        """
+        if not os.path.exists(BLACKLISTS_STATE_FILE):
+            return {}
+        try:
+            with open(BLACKLISTS_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(tr(f"Не удалось прочитать {BLACKLISTS_STATE_FILE}: {e}"))
+            return {}
+
+    def save_blacklists_state(self, state: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Сохраняет валидаторы черных списков.
+        """
+        try:
+            os.makedirs(os.path.dirname(BLACKLISTS_STATE_FILE), exist_ok=True)
+            with open(BLACKLISTS_STATE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=4)
+        except OSError as e:
+            self.logger.warning(tr(f"Не удалось сохранить {BLACKLISTS_STATE_FILE}: {e}"))
+
+    def update_blacklist(self, blacklist: Dict[str, str], state: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Обновляет один черный список с условным запросом (If-None-Match / If-Modified-Since).
+
+        :param blacklist: Описание источника из BLACKLISTS.
+        :param state: Хранилище валидаторов, обновляется на месте.
+        :return: BLACKLIST_UNCHANGED, BLACKLIST_UPDATED или BLACKLIST_FAILED.
+        """
+        name = blacklist['name']
+        url = blacklist['url']
+        output_file = blacklist['output_file']
+        validators = state.get(name, {})
+        self.logger.info(tr(f"Обновление {name} из {url}"))
+        started = time.perf_counter()
+
+        headers = {}
+        if os.path.exists(output_file):
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        try:
+            with update_sources.get(url, relative_path(output_file), headers=headers, stream=True) as response:
+                if response.status_code == 304:
+                    self.logger.info(tr(f"{name} не изменился (304)."))
+                    return BLACKLIST_UNCHANGED
+                if response.status_code != 200:
                     self.logger.warning(tr(f"Не удалось обновить {name}. Статус код: {response.status_code}"))
-                    success = False
-            except Exception as e:
-                self.logger.error(tr(f"Ошибка при обновлении {name}: {e}"))
-                success = False
-        return success
+                    return BLACKLIST_FAILED
+                temp_path, content_hash, size = stream_to_temp(
+                    iter_decompressed(
+                        monitor_chunks(
+                            response.iter_content(chunk_size=CHUNK_SIZE),
+                            metrics=getattr(response, 'metrics', None),
+                        ),
+                        blacklist.get('compression', 'auto'),
+                        url,
+                    ),
+                    output_file,
+                )
+                new_validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'sha256': content_hash,
+                }
+
+            try:
+                if content_hash == validators.get('sha256') and os.path.exists(output_file):
+                    discard_temp(temp_path)
+                    state[name] = new_validators
+                    self.logger.info(tr(f"{name} не изменился (совпадает хеш)."))
+                    return BLACKLIST_UNCHANGED
+
+                error = validate_list_file(temp_path)
+                if error:
+                    raise DownloadValidationError(error)
+                self.postprocess_blacklist(blacklist, temp_path)
+                self.record_blacklist_changes(name, output_file, temp_path)
+                atomic_replace(temp_path, output_file)
+            except BaseException:
+                discard_temp(temp_path)
+                raise
+            state[name] = new_validators
+            self.logger.info(tr(f"{name} успешно обновлён ({size} байт)."))
+            return BLACKLIST_UPDATED
+        except DownloadValidationError as e:
+            self.logger.error(tr(f"Загруженный {name} отклонён: {e}"))
+            return BLACKLIST_FAILED
+        except Exception as e:
+            self.logger.error(tr(f"Ошибка при обновлении {name}: {e}"))
+            return BLACKLIST_FAILED
+        finally:
+            self.logger.info(tr(f"{name}: загрузка заняла {time.perf_counter() - started:.2f} с"))
+
+    def postprocess_blacklist(self, blacklist: Dict[str, str], temp_path: str) -> None:
+        """
+        Обрабатывает загруженный список до его установки: доменные списки
+        нормализуются и минимизируются, списки адресов сжимаются в минимальный
+        набор подсетей.
+        """
+        if blacklist.get('type') == 'hostlist':
+            stats = minimize_hostlist_file(temp_path)
+            self.logger.info(tr(f"{blacklist['name']}: минимизация {stats}"))
+        elif blacklist.get('type') == 'ipset':
+            stats = compile_ipset_file(temp_path)
+            self.logger.info(tr(f"{blacklist['name']}: объединение подсетей {stats}"))
+
+    def record_blacklist_changes(self, name: str, old_path: str, new_path: str) -> None:
+        """
+        Сравнивает текущий и новый список и записывает различия в журнал.
+        """
+        if not os.path.exists(old_path):
+            return
+        added, removed = diff_files(old_path, new_path)
+        self.blacklist_changes[name] = (len(added), len(removed))
+        self.journal.record(name, added, removed)
+        self.logger.info(tr(f"{name}: +{len(added)} / -{len(removed)}"))
+
+    def rollback_blacklist(self, name: str) -> bool:
+        """
+        Откатывает черный список к версии до последнего обновления по журналу.
+        Валидаторы источника сбрасываются, чтобы следующее обновление загрузило
+        список заново, а не получило 304 или совпадение хеша с откаченной версией.
+        """
+        blacklist = next((item for item in self.BLACKLISTS if item['name'] == name), None)
+        if blacklist is None:
+            self.logger.error(tr(f"Неизвестный черный список: {name}"))
+            return False
+        with _blacklists_update_lock:
+            if not self.journal.rollback(name, blacklist['output_file']):
+                return False
+            state = self.load_blacklists_state()
+            if state.pop(name, None) is not None:
+                self.save_blacklists_state(state)
+        rebuild_domain_store()
+        return True
+
+    def update_blacklists(self, max_workers: Optional[int] = None, names: Optional[List[str]] = None) -> bool:
+        """
+        Обновляет черные списки параллельно через общий пул соединений.
+        Результат по каждому источнику сохраняется в self.blacklist_results.
+
+        :param max_workers: Число одновременных загрузок. По умолчанию берётся
+            из настройки "blacklists_max_workers".
+        :param names: Имена источников для обновления. По умолчанию все.
+        :return: True, если ни один источник не завершился ошибкой.
+        """
+        if not _blacklists_update_lock.acquire(blocking=False):
+            self.logger.info(tr("Черные списки уже обновляются, ожидание завершения"))
+            _blacklists_update_lock.acquire()
+        try:
+            return self._update_blacklists(max_workers, names)
+        finally:
+            _blacklists_update_lock.release()
+
+    def _update_blacklists(self, max_workers: Optional[int], names: Optional[List[str]]) -> bool:
+        blacklists = [blacklist for blacklist in self.BLACKLISTS if names is None or blacklist['name'] in names]
+        if max_workers is None:
+            max_workers = settings.value("blacklists_max_workers", DEFAULT_BLACKLIST_WORKERS, type=int)
+        max_workers = max(1, min(max_workers, len(blacklists) or 1))
+
+        state = self.load_blacklists_state()
+        self.blacklist_changes = {}
+        started = time.perf_counter()
+        with record_metrics(tr("Обновление черных списков")), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                blacklist['name']: executor.submit(contextvars.copy_context().run, self.update_blacklist, blacklist, state)
+                for blacklist in blacklists
+            }
+            results: Dict[str, str] = {name: future.result() for name, future in futures.items()}
+        self.logger.info(tr(f"Черные списки обновлены за {time.perf_counter() - started:.2f} с"))
+        self.save_blacklists_state(state)
+        self.blacklist_results = results
+        if BLACKLIST_UPDATED in results.values() or not os.path.exists(DOMAIN_STORE_PATH):
+            rebuild_domain_store()
+        return BLACKLIST_FAILED not in results.values()
 
     def terminate_process(self, process_name: str) -> None:
         """
@@ -5,7 +5,7 @@ import platform
 import subprocess
 import sys
 import winreg
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List
 
 from PyQt6.QtCore import QSettings
 from PyQt6.QtWidgets import QMessageBox
@@ -147,71 +147,6 @@ def get_executable_path() -> str:
         return f'"{sys.executable}" "{script_path}"'
 
 
-def load_script_options(config_path: str) -> Tuple[Optional[Dict[str, Tuple[str, List[str]]]], Optional[str]]:
-    """
-    Загружает опции скрипта из конфигурационного файла.
-    Возвращает словарь опций и сообщение об ошибке, если оно произошло.
-    """
-    config = configparser.ConfigParser()
-    config.optionxform = str
-    try:
-        config.read(config_path, encoding='utf-8')
-    except configparser.Error as e:
-        return None, tr("Ошибка при чтении config.ini: {error}").format(error=e)
-
-    # Проверка на дублирующиеся секции
-    section_counts = {}
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('[') and line.endswith(']'):
-                    section = line[1:-1].strip()
-                    section_counts[section] = section_counts.get(section, 0) + 1
-    except Exception as e:
-        return None, tr("Ошибка при обработке config.ini: {error}").format(error=e)
-
-    duplicates = [name for name, count in section_counts.items() if count > 1]
-    if duplicates:
-        error_message = tr("Ошибка: Названия разделов конфигурации не должны повторяться: {duplicates}").format(
-            duplicates=", ".join(duplicates)
-        )
-        return None, error_message
-
-    script_options = {}
-    for section in config.sections():
-        if section == "SCRIPT_OPTIONS":
-            continue
-
-        executable = config.get(section, 'executable', fallback=None)
-        args = config.get(section, 'args', fallback='')
-
-        args = ' '.join(args.splitlines())
-
-        args_list = [arg.strip() for arg in args.split(';') if arg.strip()] if args else []
-
-        args_list = [
-            arg.replace('{ZAPRET_FOLDER}', ZAPRET_FOLDER)
-               .replace('{BLACKLIST_FOLDER}', BLACKLIST_FOLDER)
-               .replace('{BLACKLIST_FILES_0}', BLACKLIST_FILES[0])
-               .replace('{BLACKLIST_FILES_1}', BLACKLIST_FILES[1])
-               .replace('{BLACKLIST_FILES_2}', BLACKLIST_FILES[2])
-               .replace('{BASE_FOLDER}', BASE_FOLDER)
-            for arg in args_list
-        ]
-
-        if executable:
-            executable = executable.replace('{ZAPRET_FOLDER}', ZAPRET_FOLDER)\
-                                   .replace('{BASE_FOLDER}', BASE_FOLDER)
-            if not os.path.isabs(executable):
-                executable = os.path.join(BASE_FOLDER, executable)
-
-        script_options[section] = (executable, args_list)
-
-    logger.info(tr("SCRIPT_OPTIONS загружены: {options}").format(options=script_options))
-    return script_options, None
-
-
 def create_service() -> str:
     """
     Создает и настраивает службу Windows.
@@ -0,0 +1,453 @@
+import logging
+import re
+from dataclasses import dataclass, field, replace
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.utils import tr
+
+logger = logging.getLogger("WinwsArgs")
+
+NEW_PROFILE = "--new"
+
+# Параметры WinDivert и процесса; действуют на весь запуск, где бы ни стояли
+GLOBAL_PREFIX = "--wf-"
+GLOBAL_OPTIONS = {
+    "--debug", "--dry-run", "--ipcache-lifetime", "--ipcache-hostname",
+    "--ctrack-timeouts", "--ctrack-disable", "--hostlist-auto-debug",
+}
+
+# Списки, ограничивающие профиль по хостам и адресам; могут повторяться
+HOST_FILTER_OPTIONS = (
+    "--hostlist", "--hostlist-domains", "--hostlist-exclude", "--hostlist-exclude-domains",
+    "--hostlist-auto", "--ipset", "--ipset-ip", "--ipset-exclude", "--ipset-exclude-ip",
+)
+# Прочие условия выбора профиля, которые здесь не разбираются
+OTHER_FILTER_OPTIONS = ("--filter-l7", "--filter-ssid")
+
+# Параметры, у которых winws учитывает только последнее значение
+SINGLE_VALUE_OPTIONS = {
+    "--filter-l3", "--filter-tcp", "--filter-udp", "--hostlist-auto",
+    "--dpi-desync", "--dpi-desync-repeats", "--dpi-desync-fooling",
+    "--dpi-desync-ttl", "--dpi-desync-ttl6", "--dpi-desync-autottl", "--dpi-desync-autottl6",
+    "--dpi-desync-cutoff", "--dpi-desync-start", "--dpi-desync-split-pos",
+    "--dpi-desync-split-seqovl", "--dpi-desync-any-protocol", "--wssize", "--wssize-cutoff",
+}
+
+DESYNC_MODES = {
+    "fake", "fakeknown", "rst", "rstack", "synack", "syndata", "hopbyhop", "destopt", "ipfrag1",
+    "disorder", "disorder2", "split", "split2", "multisplit", "multidisorder", "fakedsplit",
+    "fakeddisorder", "hostfakesplit", "ipfrag2", "udplen", "tamper",
+}
+FOOLING_MODES = {"none", "md5sig", "ts", "badseq", "badsum", "datanoack", "hopbyhop", "hopbyhop2"}
+L3_PROTOCOLS = {"ipv4", "ipv6"}
+
+PORT_RANGE_RE = re.compile(r"^(\d+)(?:-(\d+))?$")
+# Любой порт и отрицание диапазона в списке портов winws
+ANY_PORT = "*"
+NEGATION = "~"
+MAX_PORT = 65535
+MAX_REPEATS = 1000
+
+# Параметр и значение; у флагов значение None
+Option = Tuple[str, Optional[str]]
+
+
+class WinwsArgsError(ValueError):
+    """
+    Аргументы winws содержат недопустимое значение.
+    """
+
+
+@dataclass(frozen=True)
+class PortFilter:
+    """
+    Множество портов в виде отсортированных непересекающихся диапазонов.
+    Если список задан с * или ~, text хранит его исходную запись для вывода.
+    """
+    ranges: Tuple[Tuple[int, int], ...]
+    text: Optional[str] = field(default=None, compare=False)
+
+    @classmethod
+    def parse(cls, text: str) -> "PortFilter":
+        """
+        Разбирает список вида "80,443,50000-50099". "*" означает любой порт,
+        "~" перед диапазоном исключает его: "~443" — все порты, кроме 443.
+
+        :raises WinwsArgsError: Если список содержит недопустимый порт или диапазон.
+        """
+        included, excluded = [], []
+        for item in text.split(","):
+            item = item.strip()
+            negated = item.startswith(NEGATION)
+            if negated:
+                item = item[len(NEGATION):].strip()
+            if item == ANY_PORT:
+                low, high = 0, MAX_PORT
+            else:
+                match = PORT_RANGE_RE.match(item)
+                if not match:
+                    raise WinwsArgsError(tr("Некорректный список портов: {value}").format(value=text))
+                low = int(match.group(1))
+                high = int(match.group(2) or low)
+                if low > high or high > MAX_PORT:
+                    raise WinwsArgsError(tr("Некорректный диапазон портов: {value}").format(value=item))
+            (excluded if negated else included).append((low, high))
+        ports = cls.from_ranges(included or [(0, MAX_PORT)]).difference(cls.from_ranges(excluded))
+        if excluded or ANY_PORT in text:
+            return replace(ports, text=text)
+        return ports
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Tuple[int, int]]) -> "PortFilter":
+        merged: List[Tuple[int, int]] = []
+        for low, high in sorted(ranges):
+            if merged and low <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+            else:
+                merged.append((low, high))
+        return cls(tuple(merged))
+
+    def covers(self, other: "PortFilter") -> bool:
+        return all(
+            any(low >= own_low and high <= own_high for own_low, own_high in self.ranges)
+            for low, high in other.ranges
+        )
+
+    def union(self, other: "PortFilter") -> "PortFilter":
+        return PortFilter.from_ranges(self.ranges + other.ranges)
+
+    def difference(self, other: "PortFilter") -> "PortFilter":
+        ranges = list(self.ranges)
+        for low, high in other.ranges:
+            remaining = []
+            for own_low, own_high in ranges:
+                if high < own_low or low > own_high:
+                    remaining.append((own_low, own_high))
+                    continue
+                if own_low < low:
+                    remaining.append((own_low, low - 1))
+                if high < own_high:
+                    remaining.append((high + 1, own_high))
+            ranges = remaining
+        return PortFilter(tuple(ranges))
+
+    def __str__(self) -> str:
+        if self.text is not None:
+            return self.text
+        return ",".join(str(low) if low == high else f"{low}-{high}" for low, high in self.ranges)
+
+
+# Без --filter-tcp и --filter-udp профиль подходит для любых портов обоих протоколов
+ALL_PORTS = PortFilter(((0, MAX_PORT),))
+NO_PORTS = PortFilter(())
+
+
+@dataclass(frozen=True)
+class DesyncProfile:
+    """
+    Профиль winws между разделителями --new.
+
+    Поля tcp/udp/l3 равны None, если ограничение не задано.
+    host_filters и options хранят параметры в исходном порядке.
+    Профиль с непонятными разбору значениями хранится как есть в raw и не упрощается.
+    """
+    l3: Optional[FrozenSet[str]] = None
+    tcp: Optional[PortFilter] = None
+    udp: Optional[PortFilter] = None
+    host_filters: Tuple[Option, ...] = ()
+    desync: Tuple[str, ...] = ()
+    repeats: Optional[int] = None
+    fooling: Tuple[str, ...] = ()
+    options: Tuple[Option, ...] = ()
+    raw: Optional[Tuple[str, ...]] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self == DesyncProfile()
+
+    def ports(self) -> Tuple[PortFilter, PortFilter]:
+        """
+        Порты TCP и UDP, на которые реагирует профиль.
+        """
+        if self.tcp is None and self.udp is None:
+            return ALL_PORTS, ALL_PORTS
+        return self.tcp or NO_PORTS, self.udp or NO_PORTS
+
+    def covers(self, other: "DesyncProfile") -> bool:
+        """
+        Проверяет, что профиль подходит для любого соединения, для которого подходит other.
+        Списки хостов сравниваются только на совпадение, поэтому результат консервативен.
+        """
+        if self.raw is not None or other.raw is not None:
+            return False
+        if self.l3 is not None and (other.l3 is None or not other.l3 <= self.l3):
+            return False
+        own_tcp, own_udp = self.ports()
+        other_tcp, other_udp = other.ports()
+        if not (own_tcp.covers(other_tcp) and own_udp.covers(other_udp)):
+            return False
+        if self.host_filters and set(self.host_filters) != set(other.host_filters):
+            return False
+        return self.filter_options() == other.filter_options()
+
+    def filter_options(self) -> Tuple[Option, ...]:
+        return tuple(option for option in self.options if option[0] in OTHER_FILTER_OPTIONS)
+
+    def merge(self, other: "DesyncProfile") -> Optional["DesyncProfile"]:
+        """
+        Объединяет профили одного протокола, отличающиеся только портами.
+
+        :return: Объединённый профиль или None, если профили нельзя объединить.
+        """
+        if self.raw is not None or other.raw is not None:
+            return None
+        filters = (self.tcp, self.udp, other.tcp, other.udp)
+        if any(ports is not None and ports.text is not None for ports in filters):
+            # Запись с * и ~ сохраняется как есть, объединение переписало бы её диапазонами
+            return None
+        if replace(self, tcp=None, udp=None) != replace(other, tcp=None, udp=None):
+            return None
+        if self.tcp is not None and other.tcp is not None and self.udp is None and other.udp is None:
+            return replace(self, tcp=self.tcp.union(other.tcp))
+        if self.udp is not None and other.udp is not None and self.tcp is None and other.tcp is None:
+            return replace(self, udp=self.udp.union(other.udp))
+        return None
+
+    def to_args(self) -> List[str]:
+        """
+        Аргументы профиля в каноническом порядке: фильтры, списки, параметры обхода.
+        """
+        if self.raw is not None:
+            return list(self.raw)
+        args: List[Option] = []
+        if self.l3 is not None:
+            args.append(("--filter-l3", ",".join(sorted(self.l3))))
+        if self.tcp is not None:
+            args.append(("--filter-tcp", str(self.tcp)))
+        if self.udp is not None:
+            args.append(("--filter-udp", str(self.udp)))
+        args.extend(self.host_filters)
+        if self.desync:
+            args.append(("--dpi-desync", ",".join(self.desync)))
+        if self.repeats is not None:
+            args.append(("--dpi-desync-repeats", str(self.repeats)))
+        if self.fooling:
+            args.append(("--dpi-desync-fooling", ",".join(self.fooling)))
+        args.extend(self.options)
+        return [format_option(option) for option in args]
+
+
+@dataclass
+class WinwsCommand:
+    """
+    Разобранные аргументы winws: глобальные параметры и профили по порядку.
+    """
+    global_options: Dict[str, Optional[str]] = field(default_factory=dict)
+    profiles: List[DesyncProfile] = field(default_factory=list)
+    # Удалённые при разборе точные повторы параметров внутри профилей
+    repeated: int = 0
+    # Значения, которые разбор не понял; такие параметры и профили передаются как есть
+    warnings: List[str] = field(default_factory=list)
+
+    def to_args(self) -> List[str]:
+        args = [format_option(option) for option in self.global_options.items()]
+        for index, profile in enumerate(self.profiles):
+            if index:
+                args.append(NEW_PROFILE)
+            args.extend(profile.to_args())
+        return args
+
+
+@dataclass
+class OptimizeStats:
+    """
+    Результат упрощения профилей.
+    """
+    before: int = 0
+    after: int = 0
+    duplicates: int = 0
+    shadowed: int = 0
+    merged: int = 0
+    empty: int = 0
+    repeated: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return self.before != self.after or self.repeated > 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.before} -> {self.after} "
+            f"(дубликаты: {self.duplicates}, перекрытые: {self.shadowed}, "
+            f"объединённые: {self.merged}, пустые: {self.empty}, "
+            f"повторы параметров: {self.repeated})"
+        )
+
+
+def split_option(arg: str) -> Option:
+    """
+    Делит аргумент "--name=value" на имя и значение.
+
+    :raises WinwsArgsError: Если аргумент не начинается с "--".
+    """
+    if not arg.startswith("--"):
+        raise WinwsArgsError(tr("Некорректный аргумент winws: {value}").format(value=arg))
+    name, separator, value = arg.partition("=")
+    return name, value if separator else None
+
+
+def format_option(option: Option) -> str:
+    name, value = option
+    return name if value is None else f"{name}={value}"
+
+
+def _parse_list(name: str, value: Optional[str], allowed: Iterable[str]) -> Tuple[str, ...]:
+    items = tuple(item.strip() for item in (value or "").split(",") if item.strip())
+    unknown = [item for item in items if item not in allowed]
+    if not items or unknown:
+        raise WinwsArgsError(tr("Недопустимое значение {name}: {value}").format(name=name, value=value))
+    return items
+
+
+def _parse_profile(options: List[Option], number: int) -> Tuple[DesyncProfile, int]:
+    """
+    :return: Профиль и число удалённых точных повторов параметров.
+    """
+    # Для однозначных параметров остаётся последнее значение, как в winws
+    latest: Dict[str, Optional[str]] = {}
+    for name, value in options:
+        if name in SINGLE_VALUE_OPTIONS:
+            if name in latest and latest[name] != value:
+                logger.warning(tr("Профиль {number}: {name} задан повторно, используется {value}").format(
+                    number=number, name=name, value=value
+                ))
+            latest[name] = value
+
+    values: Dict[str, object] = {}
+    host_filters: List[Option] = []
+    other: List[Option] = []
+    seen = set()
+    repeated = 0
+    for name, value in options:
+        if name in SINGLE_VALUE_OPTIONS:
+            if name in seen:
+                continue
+            seen.add(name)
+            value = latest[name]
+        if value is None and name in ("--filter-l3", "--filter-tcp", "--filter-udp", "--dpi-desync",
+                                      "--dpi-desync-repeats", "--dpi-desync-fooling"):
+            raise WinwsArgsError(tr("Параметр {name} требует значение").format(name=name))
+
+        if name == "--filter-l3":
+            values["l3"] = frozenset(_parse_list(name, value, L3_PROTOCOLS))
+        elif name == "--filter-tcp":
+            values["tcp"] = PortFilter.parse(value)
+        elif name == "--filter-udp":
+            values["udp"] = PortFilter.parse(value)
+        elif name == "--dpi-desync":
+            values["desync"] = _parse_list(name, value, DESYNC_MODES)
+        elif name == "--dpi-desync-fooling":
+            values["fooling"] = _parse_list(name, value, FOOLING_MODES)
+        elif name == "--dpi-desync-repeats":
+            if not value.isdigit() or not 1 <= int(value) <= MAX_REPEATS:
+                raise WinwsArgsError(tr("Недопустимое значение {name}: {value}").format(name=name, value=value))
+            values["repeats"] = int(value)
+        elif name in HOST_FILTER_OPTIONS:
+            if (name, value) in host_filters:
+                repeated += 1
+            else:
+                host_filters.append((name, value))
+        elif (name, value) in other:
+            # Повторяемый параметр с тем же значением ничего не добавляет, остаётся первый
+            repeated += 1
+        else:
+            other.append((name, value))
+    return DesyncProfile(host_filters=tuple(host_filters), options=tuple(other), **values), repeated
+
+
+def parse_winws_args(args: Iterable[str]) -> WinwsCommand:
+    """
+    Разбирает аргументы winws на глобальные параметры и профили.
+    Незнакомое значение (например, режим новой версии zapret) не считается
+    ошибкой: в command.warnings добавляется предупреждение, а профиль
+    сохраняется без изменений.
+
+    :raises WinwsArgsError: Если аргумент не является параметром winws.
+    """
+    command = WinwsCommand()
+    groups: List[List[Option]] = [[]]
+    for arg in args:
+        if arg == NEW_PROFILE:
+            groups.append([])
+            continue
+        name, value = split_option(arg)
+        if name.startswith(GLOBAL_PREFIX) or name in GLOBAL_OPTIONS:
+            try:
+                if name in ("--wf-tcp", "--wf-udp") and value is not None:
+                    value = str(PortFilter.parse(value))
+                elif name == "--wf-l3":
+                    value = ",".join(_parse_list(name, value, L3_PROTOCOLS))
+            except WinwsArgsError as e:
+                _warn(command, str(e))
+            if command.global_options.get(name, value) != value:
+                logger.warning(tr("{name} задан повторно, используется {value}").format(name=name, value=value))
+            command.global_options[name] = value
+        else:
+            groups[-1].append((name, value))
+    for number, options in enumerate(groups, 1):
+        try:
+            profile, repeated = _parse_profile(options, number)
+        except WinwsArgsError as e:
+            _warn(command, tr("Профиль {number} передаётся без изменений: {error}").format(number=number, error=e))
+            profile, repeated = DesyncProfile(raw=tuple(format_option(option) for option in options)), 0
+        command.profiles.append(profile)
+        command.repeated += repeated
+    return command
+
+
+def _warn(command: WinwsCommand, message: str) -> None:
+    logger.warning(message)
+    command.warnings.append(message)
+
+
+def optimize_profiles(profiles: List[DesyncProfile]) -> Tuple[List[DesyncProfile], OptimizeStats]:
+    """
+    Удаляет профили, которые winws никогда не выберет, и объединяет соседние
+    профили, отличающиеся только портами.
+
+    winws применяет к соединению первый подходящий профиль, поэтому профиль,
+    все соединения которого уже подходят под один из предыдущих, лишний.
+
+    :return: Упрощённый список профилей и статистика.
+    """
+    stats = OptimizeStats(before=len(profiles))
+    result: List[DesyncProfile] = []
+    for profile in profiles:
+        if profile in result:
+            stats.duplicates += 1
+        elif any(previous.covers(profile) for previous in result):
+            stats.shadowed += 1
+        elif result and (merged := result[-1].merge(profile)) is not None:
+            result[-1] = merged
+            stats.merged += 1
+        else:
+            result.append(profile)
+
+    # Пустой последний профиль ничего не меняет (например, после завершающего --new)
+    while len(result) > 1 and result[-1].is_empty:
+        result.pop()
+        stats.empty += 1
+    stats.after = len(result)
+    return result, stats
+
+
+def canonical_args(args: Iterable[str]) -> Tuple[List[str], OptimizeStats]:
+    """
+    Проверяет аргументы winws и возвращает их в каноническом виде без лишних профилей.
+
+    :raises WinwsArgsError: Если аргумент или значение недопустимы.
+    """
+    command = parse_winws_args(args)
+    command.profiles, stats = optimize_profiles(command.profiles)
+    stats.repeated = command.repeated
+    return command.to_args(), stats